@@ -0,0 +1,85 @@
+# backend/app.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from llama_index.core import Settings
+from llama_index.llms.openai import OpenAI
+
+from backend.core.config import settings
+from backend.routes import base, bots, chat, documents, metrics, uploads
+from backend.services.bot_manager import BotManager
+from backend.services.file_service import MULTIPART_OVERHEAD, UploadLimitMiddleware
+from backend.services.metrics import MetricsMiddleware, install_llm_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the app's single BotManager and release it on shutdown."""
+    bot_manager = BotManager()
+    app.state.bot_manager = bot_manager
+    reaper = asyncio.create_task(
+        bot_manager.run_idle_reaper(settings.BOT_REAP_INTERVAL))
+    try:
+        if settings.LAZY_BOT_LOADING:
+            logger.info("Lazy bot loading enabled; indices open on first request")
+        else:
+            await bot_manager.open_all_bots()
+        yield
+    finally:
+        reaper.cancel()
+        with suppress(asyncio.CancelledError):
+            await reaper
+        bot_manager.shutdown()
+
+
+def configure_llm() -> None:
+    """Load environment variables and configure the LLM."""
+    load_dotenv()
+    Settings.llm = OpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.1,
+        system_prompt="Responde siempre en español de manera formal y técnica."
+    )
+    # Retrieval and LLM timings and token counts for /metrics
+    install_llm_metrics()
+
+
+def create_app() -> FastAPI:
+    """Build the API; bot indices and caches are opened by its lifespan."""
+    configure_llm()
+
+    app = FastAPI(
+        title="Multi-Bot Chat System",
+        description="API for managing multiple chat bots with document indexing capabilities",
+        lifespan=lifespan
+    )
+
+    # Refuse oversized uploads before Starlette spools them to a temp file
+    single_upload = settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+    app.add_middleware(UploadLimitMiddleware, routes=app.routes, limits={
+        "/upload/{bot_id}": single_upload,
+        "/documents/upload/{bot_id}": single_upload,
+        "/upload/{bot_id}/batch": settings.MAX_BATCH_UPLOAD_BYTES,
+    })
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+    app.include_router(base.router)
+    app.include_router(bots.router, prefix="/bots")
+    app.include_router(chat.router, prefix="/chat")
+    # Also serves /documents/upload/{bot_id}
+    app.include_router(documents.router, prefix="/documents")
+    app.include_router(uploads.router)
+    app.include_router(metrics.router)
+    return app
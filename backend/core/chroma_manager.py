@@ -1,13 +1,85 @@
 # backend/core/chroma_manager.py
 import chromadb
 import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from chromadb.api.client import SharedSystemClient
 
 logger = logging.getLogger(__name__)
 
 
 class ChromaManager:
     def __init__(self, base_dir: str):
-        self.client = chromadb.PersistentClient(path=base_dir)
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        # Systems of replaced clients, stopped at the next refresh
+        self._retired = []
+        # Writes in progress per system, keyed by id(); see pinned()
+        self._pins = defaultdict(int)
+        self.client = self._open()
+
+    def _open(self):
+        return chromadb.PersistentClient(path=self.base_dir)
+
+    def refresh(self) -> None:
+        """Open a new client so collections are re-read from disk.
+
+        Needed to see writes made by other processes. The old client's
+        system is not stopped right away: collections obtained from it keep
+        answering queries already running on them, and should be swapped for
+        ones from the new client meanwhile. It is stopped on the next refresh,
+        or a later one if a write pinned to it is still running.
+        """
+        with self._lock:
+            retired, self._retired = self._retired, []
+            for system in retired:
+                if self._pins[id(system)]:
+                    self._retired.append(system)
+                else:
+                    self._pins.pop(id(system), None)
+                    self._stop(system)
+
+            identifier = getattr(self.client, "_identifier", None)
+            if identifier is None:
+                SharedSystemClient.clear_system_cache()
+            else:
+                system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+                if system is not None:
+                    self._retired.append(system)
+            self.client = self._open()
+
+    @contextmanager
+    def pinned(self):
+        """Keep the current client's system running for the whole block.
+
+        For ingestion and deletions, which hold a collection for longer than
+        a query and may outlive several refreshes.
+        """
+        with self._lock:
+            key = id(SharedSystemClient._identifier_to_system.get(
+                self.client._identifier))
+            self._pins[key] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+
+    def close(self) -> None:
+        """Stop the systems of replaced clients."""
+        with self._lock:
+            for system in self._retired:
+                self._stop(system)
+            self._retired = []
+            self._pins.clear()
+
+    @staticmethod
+    def _stop(system) -> None:
+        try:
+            system.stop()
+        except Exception as e:
+            logger.warning(f"Stopping a replaced Chroma client failed: {str(e)}")
 
     def get_collection(self, name: str):
         return self.client.get_or_create_collection(
@@ -20,3 +92,7 @@ class ChromaManager:
             self.client.delete_collection(name)
         except Exception as e:
             logger.warning(f"Collection deletion failed: {str(e)}")
+
+    def reset_collection(self, name: str):
+        self.delete_collection(name)
+        return self.get_collection(name)
@@ -7,20 +7,112 @@ class Settings:
     def __init__(self):
         load_dotenv()
         self.CHROMA_DIR = "./chroma-data"
+        # Ingestion manifests (file hashes and vector IDs per bot)
+        self.STATE_DIR = "./index-state"
+        # Chunk embeddings shared by every bot, keyed by model and text hash
+        self.EMBEDDING_CACHE_PATH = os.path.join(
+            self.STATE_DIR, "embeddings.sqlite3")
+        self.EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+        # Query embeddings kept in memory, shared by bots using the same model
+        self.QUERY_EMBEDDING_CACHE_SIZE = int(
+            os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+        # BM25 keyword index of every bot's chunks (SQLite FTS5)
+        self.KEYWORD_INDEX_PATH = os.path.join(
+            self.STATE_DIR, "keywords.sqlite3")
+        # Fuse keyword and vector results; keyword results alone are used
+        # when vector retrieval takes longer than the timeout in seconds
+        self.HYBRID_RETRIEVAL = os.getenv(
+            "HYBRID_RETRIEVAL", "true").lower() == "true"
+        self.VECTOR_RETRIEVAL_TIMEOUT = float(
+            os.getenv("VECTOR_RETRIEVAL_TIMEOUT", "3"))
+        # Chunks retrieved per question, and the most of them, and of their
+        # tokens, passed on to the LLM; bots may set their own token budget
+        self.RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "10"))
+        self.CONTEXT_MAX_CHUNKS = int(os.getenv("CONTEXT_MAX_CHUNKS", "5"))
+        self.CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+        # Per-bot index versions shared by all worker processes, and seconds
+        # between checks of a bot's version while serving requests
+        self.INDEX_VERSIONS_PATH = os.path.join(
+            self.STATE_DIR, "index-versions.sqlite3")
+        self.INDEX_VERSION_CHECK_INTERVAL = float(
+            os.getenv("INDEX_VERSION_CHECK_INTERVAL", "1"))
+        # Ingestion job states, readable from any worker process
+        self.JOB_STORE_PATH = os.path.join(self.STATE_DIR, "jobs.sqlite3")
+        # Bot definitions; seeded from BOT_CONFIG when first created
+        self.BOT_REGISTRY_PATH = os.path.join(self.STATE_DIR, "bots.sqlite3")
+        # Bot indices kept open at once, and seconds an unused one stays open
+        self.MAX_LIVE_BOTS = int(os.getenv("MAX_LIVE_BOTS", "32"))
+        self.BOT_IDLE_TTL = int(os.getenv("BOT_IDLE_TTL", "1800"))
+        self.BOT_REAP_INTERVAL = 60
+        # Open bot indices on first request instead of at startup
+        self.LAZY_BOT_LOADING = os.getenv(
+            "LAZY_BOT_LOADING", "false").lower() == "true"
+        # Background ingestion: worker threads and maximum unfinished jobs
+        self.INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+        self.INGESTION_MAX_PENDING = 100
+        # Processes used to parse PDF/DOCX files during ingestion
+        self.PARSE_WORKERS = int(
+            os.getenv("PARSE_WORKERS", str(os.cpu_count() or 1)))
+        # Extracted text of parsed files, keyed by content hash
+        self.PARSE_CACHE_DIR = os.path.join(self.STATE_DIR, "parsed")
+        self.PARSE_CACHE_MAX_BYTES = int(
+            os.getenv("PARSE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+        # Threads for blocking work offloaded from async request handlers
+        self.BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "8"))
+        # Per-conversation chat memory: live sessions, idle TTL in seconds and
+        # an optional SQLite file where evicted sessions are kept
+        self.MAX_CHAT_SESSIONS = int(os.getenv("MAX_CHAT_SESSIONS", "1000"))
+        self.CHAT_SESSION_TTL = int(os.getenv("CHAT_SESSION_TTL", "3600"))
+        self.CHAT_SESSION_SPILL_PATH = os.getenv("CHAT_SESSION_SPILL_PATH")
+        # Fold turns older than the last CHAT_RECENT_TURNS into a running
+        # summary of at most CHAT_SUMMARY_MAX_WORDS words, written after
+        # the reply is sent; history tokens sent per message stay under
+        # CHAT_MEMORY_TOKEN_LIMIT either way
+        self.CHAT_MEMORY_SUMMARY = os.getenv(
+            "CHAT_MEMORY_SUMMARY", "true").lower() == "true"
+        self.CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "3"))
+        self.CHAT_SUMMARY_MAX_WORDS = 200
+        self.CHAT_MEMORY_TOKEN_LIMIT = int(
+            os.getenv("CHAT_MEMORY_TOKEN_LIMIT", "2000"))
+        # Semantic answer cache: minimum cosine similarity and answers per bot
+        self.ANSWER_CACHE_THRESHOLD = float(
+            os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+        self.ANSWER_CACHE_MAX_ENTRIES = 500
+        # POST /chat/{bot_id}/batch: default and maximum queries answered at
+        # once, and maximum queries per request
+        self.BATCH_CHAT_CONCURRENCY = int(os.getenv("BATCH_CHAT_CONCURRENCY", "4"))
+        self.BATCH_CHAT_MAX_CONCURRENCY = int(
+            os.getenv("BATCH_CHAT_MAX_CONCURRENCY", "16"))
+        self.BATCH_CHAT_MAX_QUERIES = 1000
+        # LLM admission control: calls running at once overall and per bot,
+        # calls allowed to wait, and seconds one may wait before a 429
+        self.LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.LLM_MAX_CONCURRENCY_PER_BOT = int(
+            os.getenv("LLM_MAX_CONCURRENCY_PER_BOT", "4"))
+        self.LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+        self.LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+        # Uploads are streamed to disk and rejected past this size per file;
+        # batch upload requests are refused past the total size
+        self.MAX_UPLOAD_BYTES = int(
+            os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+        self.MAX_BATCH_UPLOAD_BYTES = int(
+            os.getenv("MAX_BATCH_UPLOAD_MB", "500")) * 1024 * 1024
         self.BOT_CONFIG = {
             "bot1": {
                 "name": "Derechos Humanos",
                 "description": "Asistente general para consultas de documentos",
                 "system_prompt": "Responde siempre en español de manera formal y técnica.",
                 "collection_name": "documents_collection_bot1",
-                "data_dir": "./data_bot1"
+                "data_dir": "./data_bot1",
+                "answer_cache": True
             },
             "bot2": {
                 "name": "Penal II",
                 "description": "Especialista en documentación técnica",
                 "system_prompt": "Responde en español, enfocándote en detalles técnicos y específicos.",
                 "collection_name": "documents_collection_bot2",
-                "data_dir": "./data_bot2"
+                "data_dir": "./data_bot2",
+                "answer_cache": True
             }
         }
 
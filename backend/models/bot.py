@@ -1,5 +1,16 @@
-# backend/models/bot.py
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+# Bot IDs appear in URLs, directory names and collection names
+BOT_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+
+def default_data_dir(bot_id: str) -> str:
+    return f"./data_{bot_id}"
+
+
+def default_collection_name(bot_id: str) -> str:
+    return f"documents_collection_{bot_id}"
 
 
 class Bot(BaseModel):
@@ -9,3 +20,49 @@ class Bot(BaseModel):
     system_prompt: str
     collection_name: str
     data_dir: str
+    answer_cache: bool = False
+    # Tokens of retrieved context per question; None uses CONTEXT_TOKEN_BUDGET
+    context_token_budget: Optional[int] = None
+    # Share of LLM capacity while bots are queued, relative to other bots
+    llm_weight: float = 1.0
+    # Created through the API, with a data directory and collection derived
+    # from its ID; only these are removed when the bot is purged
+    managed: bool = False
+
+
+class BotCreate(BaseModel):
+    """Body of POST /bots; storage locations are always derived from id."""
+    # Reject data_dir and collection_name instead of silently ignoring them
+    model_config = ConfigDict(extra="forbid")
+
+    id: str = Field(..., pattern=BOT_ID_PATTERN)
+    name: str
+    description: str = ""
+    system_prompt: str
+    answer_cache: bool = False
+    context_token_budget: Optional[int] = Field(None, gt=0)
+    llm_weight: float = Field(1.0, gt=0)
+
+    def to_bot(self) -> Bot:
+        return Bot(
+            id=self.id,
+            name=self.name,
+            description=self.description,
+            system_prompt=self.system_prompt,
+            collection_name=default_collection_name(self.id),
+            data_dir=default_data_dir(self.id),
+            answer_cache=self.answer_cache,
+            context_token_budget=self.context_token_budget,
+            llm_weight=self.llm_weight,
+            managed=True
+        )
+
+
+class BotUpdate(BaseModel):
+    """Body of PUT /bots/{bot_id}; storage locations cannot change."""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    system_prompt: Optional[str] = None
+    answer_cache: Optional[bool] = None
+    context_token_budget: Optional[int] = Field(None, gt=0)
+    llm_weight: Optional[float] = Field(None, gt=0)
@@ -1,13 +1,15 @@
-# backend/routes/bots.py
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from backend.models.bot import Bot, BotCreate, BotUpdate
+from backend.routes.deps import get_bot, get_bot_manager
 from backend.services.bot_manager import BotManager
+from backend.services.bot_registry import BotExists
 
 router = APIRouter()
-bot_manager = BotManager()
 
 
 @router.get("")
-async def get_bots():
+async def get_bots(bot_manager: BotManager = Depends(get_bot_manager)):
+    """Get list of available bots."""
     return {
         "bots": [
             {
@@ -17,3 +19,34 @@ async def get_bots():
             } for bot in bot_manager.bots.values()
         ]
     }
+
+
+@router.post("", status_code=201)
+async def create_bot(config: BotCreate,
+                     bot_manager: BotManager = Depends(get_bot_manager)) -> Bot:
+    """Register a bot; its index is created when it is first used."""
+    try:
+        return await bot_manager.run_blocking(
+            bot_manager.create_bot, config.to_bot())
+    except BotExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/{bot_id}")
+async def get_bot_config(bot: Bot = Depends(get_bot)) -> Bot:
+    return bot
+
+
+@router.put("/{bot_id}")
+async def update_bot(changes: BotUpdate, bot: Bot = Depends(get_bot),
+                     bot_manager: BotManager = Depends(get_bot_manager)) -> Bot:
+    return await bot_manager.run_blocking(
+        bot_manager.update_bot, bot.id, changes)
+
+
+@router.delete("/{bot_id}")
+async def delete_bot(purge: bool = False, bot: Bot = Depends(get_bot),
+                     bot_manager: BotManager = Depends(get_bot_manager)):
+    """Unregister a bot; purge=true also deletes its vectors and documents."""
+    await bot_manager.run_blocking(bot_manager.delete_bot, bot.id, purge)
+    return {"status": f"Bot '{bot.id}' deleted"}
@@ -1,46 +1,282 @@
-from fastapi import APIRouter, Body, HTTPException
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from backend.core.config import settings
+from backend.models.bot import Bot
+from backend.routes.deps import get_bot, get_bot_manager
 from backend.services.bot_manager import BotManager
+from backend.services.llm_scheduler import LLMSlot, SchedulerBusy
 
 router = APIRouter()
-bot_manager = BotManager()
+logger = logging.getLogger(__name__)
+
+
+def sse_event(data, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Event carrying a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """Streaming response that gives its LLM slot back once it is over.
+
+    The body's own finally does not run when the client disconnects before
+    Starlette starts iterating it, so the slot is also released here.
+    """
+
+    def __init__(self, content, slot: Optional[LLMSlot] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slot is not None:
+                self.slot.release()
+
+
+def too_busy(error: SchedulerBusy) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many chat requests, please retry shortly",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def source_metadata(source_nodes) -> List[dict]:
+    return [
+        {
+            "file_name": node.metadata.get("file_name"),
+            "page_label": node.metadata.get("page_label"),
+            "score": node.score
+        } for node in source_nodes
+    ]
 
 
 @router.post("/{bot_id}")
-async def chat(bot_id: str, query: str = Body(..., embed=True)):
-    if bot_id not in bot_manager.bots:
-        raise HTTPException(status_code=404, detail="Bot not found")
+async def chat(background_tasks: BackgroundTasks,
+               query: str = Body(..., embed=True),
+               session_id: Optional[str] = Body(None, embed=True),
+               bot: Bot = Depends(get_bot),
+               bot_manager: BotManager = Depends(get_bot_manager)):
+    """Answer a message within a conversation.
 
-    bot = bot_manager.bots[bot_id]
-    index = bot_manager.indices.get(bot_id)
-    chat_memory = bot_manager.memories.get(bot_id)
+    Clients should send the session_id returned by their first call; a new
+    conversation is started when it is omitted. Answers a 429 with
+    Retry-After when too many requests are waiting for the LLM.
+    """
+    bot_id = bot.id
+    session_id = session_id or uuid.uuid4().hex
+    chat_engine = await bot_manager.aget_chat_engine(bot_id, session_id)
+    chat_memory = bot_manager.memory_store.get(bot_id, session_id)
 
-    if index is None:
+    if chat_engine is None:
         raise HTTPException(
             status_code=400,
             detail="Index is not initialized. Please upload a file first."
         )
-
     try:
-        chat_engine = index.as_chat_engine(
-            chat_memory=chat_memory,
-            similarity_top_k=3,
-            system_prompt=bot.system_prompt
-        )
-        response = chat_engine.chat(query)
+        cached, cache_key = await bot_manager.find_cached_answer(
+            bot_id, query, chat_memory)
+        if cached:
+            response_text = cached["response"]
+            bot_manager.remember_turn(chat_memory, query, response_text)
+        else:
+            async with bot_manager.llm_scheduler.slot(bot_id, bot.llm_weight):
+                response = await chat_engine.achat(query)
+            response_text = str(response)
+            bot_manager.cache_answer(
+                bot_id, cache_key, response_text,
+                source_metadata(response.source_nodes))
 
         # Access chat messages directly from the memory buffer
         messages = chat_memory.get() if chat_memory else []
+        background_tasks.add_task(
+            bot_manager.summarize_memory, bot_id, chat_memory)
 
         return {
-            "response": str(response),
+            "response": response_text,
+            "session_id": session_id,
             "context": [
                 {"role": "user" if msg.role == "human" else "assistant",
                  "content": msg.content}
                 for msg in messages[-2:]
             ] if messages else []
         }
+    except SchedulerBusy as e:
+        raise too_busy(e)
     except Exception as e:
+        logger.error(f"Error during chat execution for bot {bot_id}: {e}")
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to process chat message: {str(e)}"
+            detail="Failed to process the chat message"
         )
+
+
+@router.post("/{bot_id}/stream")
+async def chat_stream(query: str = Body(..., embed=True),
+                      session_id: Optional[str] = Body(None, embed=True),
+                      bot: Bot = Depends(get_bot),
+                      bot_manager: BotManager = Depends(get_bot_manager)):
+    """Stream the answer as Server-Sent Events.
+
+    Emits a `sources` event with the retrieved chunks' metadata, one data
+    event per token, and a final `done` event with the full response and
+    session_id. Chat memory is updated once the stream completes and
+    summarized after the response ends.
+    """
+    bot_id = bot.id
+    session_id = session_id or uuid.uuid4().hex
+    chat_engine = await bot_manager.aget_chat_engine(bot_id, session_id)
+    chat_memory = bot_manager.memory_store.get(bot_id, session_id)
+    if chat_engine is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Index is not initialized. Please upload a file first."
+        )
+
+    response = slot = None
+    try:
+        cached, cache_key = await bot_manager.find_cached_answer(
+            bot_id, query, chat_memory)
+        if not cached:
+            # Held until the last token has been streamed
+            slot = await bot_manager.llm_scheduler.acquire(bot_id, bot.llm_weight)
+            try:
+                response = await chat_engine.astream_chat(query)
+            except BaseException:
+                slot.release()
+                raise
+    except SchedulerBusy as e:
+        raise too_busy(e)
+    except Exception as e:
+        logger.error(f"Error starting chat stream for bot {bot_id}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to process the chat message"
+        )
+
+    async def event_stream():
+        if cached:
+            bot_manager.remember_turn(chat_memory, query, cached["response"])
+            yield sse_event(cached["sources"], event="sources")
+            yield sse_event({"token": cached["response"]})
+            yield sse_event(
+                {"response": cached["response"], "session_id": session_id},
+                event="done")
+            return
+
+        try:
+            sources = source_metadata(response.source_nodes)
+            yield sse_event(sources, event="sources")
+            async for token in response.async_response_gen():
+                yield sse_event({"token": token})
+            bot_manager.cache_answer(
+                bot_id, cache_key, response.response, sources)
+            yield sse_event(
+                {"response": response.response, "session_id": session_id},
+                event="done")
+        except Exception as e:
+            logger.error(f"Error during chat stream for bot {bot_id}: {e}")
+            yield sse_event(
+                {"detail": "Failed to process the chat message"}, event="error")
+        finally:
+            # Free the slot as soon as the last token is out
+            slot.release()
+
+    return SlotStreamingResponse(
+        event_stream(),
+        slot=slot,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Session-Id": session_id
+        },
+        background=BackgroundTask(
+            bot_manager.summarize_memory, bot_id, chat_memory)
+    )
+
+
+@router.post("/{bot_id}/batch")
+async def chat_batch(queries: List[str] = Body(..., embed=True),
+                     concurrency: Optional[int] = Body(None, embed=True),
+                     bot: Bot = Depends(get_bot),
+                     bot_manager: BotManager = Depends(get_bot_manager)):
+    """Answer independent questions concurrently, streamed as NDJSON.
+
+    Every query runs without chat memory and bypasses the answer cache, so
+    results do not depend on each other or on earlier conversations. One
+    line per query is written as soon as it completes (in completion order,
+    with its index in the request and its duration), then a summary line.
+    """
+    if not queries:
+        raise HTTPException(status_code=400, detail="No queries given")
+    if len(queries) > settings.BATCH_CHAT_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_CHAT_MAX_QUERIES} queries per batch")
+    concurrency = min(max(concurrency or settings.BATCH_CHAT_CONCURRENCY, 1),
+                      settings.BATCH_CHAT_MAX_CONCURRENCY)
+
+    if await bot_manager.aget_stateless_chat_engine(bot.id) is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Index is not initialized. Please upload a file first."
+        )
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(index: int, query: str) -> dict:
+        async with semaphore:
+            started = time.perf_counter()
+            result = {"index": index, "query": query, "response": None,
+                      "sources": [], "error": None}
+            try:
+                # Reuses the open index; only reopening it leaves the loop
+                chat_engine = await bot_manager.aget_stateless_chat_engine(bot.id)
+                if chat_engine is None:
+                    raise Exception("Index is not initialized")
+                async with bot_manager.llm_scheduler.slot(bot.id, bot.llm_weight):
+                    response = await chat_engine.achat(query)
+                result["response"] = str(response)
+                result["sources"] = source_metadata(response.source_nodes)
+            except SchedulerBusy as e:
+                result["error"] = "Too many chat requests, please retry shortly"
+                result["retry_after"] = e.retry_after
+            except Exception as e:
+                logger.error(f"Error in batch chat for bot {bot.id}: {e}")
+                result["error"] = "Failed to process the chat message"
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+    async def results():
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(answer(i, query))
+                 for i, query in enumerate(queries)]
+        errors = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                errors += result["error"] is not None
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            yield json.dumps({
+                "done": True,
+                "queries": len(queries),
+                "errors": errors,
+                "concurrency": concurrency,
+                "seconds": round(time.perf_counter() - started, 3)
+            }) + "\n"
+        finally:
+            # The client went away: stop the queries still waiting or running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -0,0 +1,23 @@
+# backend/routes/deps.py
+from fastapi import Depends, HTTPException, Request
+
+from backend.models.bot import Bot
+from backend.services.bot_manager import BotManager
+
+
+def get_bot_manager(request: Request) -> BotManager:
+    """The BotManager created by the app's lifespan."""
+    return request.app.state.bot_manager
+
+
+def get_bot(bot_id: str,
+            bot_manager: BotManager = Depends(get_bot_manager)) -> Bot:
+    """The bot named by the bot_id path parameter, or a 404."""
+    bot = bot_manager.bots.get(bot_id)
+    if bot is None:
+        # Possibly created by another worker process since the last reload
+        bot_manager.reload_bots()
+        bot = bot_manager.bots.get(bot_id)
+    if bot is None:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return bot
@@ -1,72 +1,44 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
+import logging
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from backend.models.bot import Bot
+from backend.routes.deps import get_bot, get_bot_manager
+from backend.routes.uploads import queue_uploads
 from backend.services.bot_manager import BotManager
-import os
 
 router = APIRouter()
-bot_manager = BotManager()
+logger = logging.getLogger(__name__)
 
 
 @router.get("/{bot_id}")
-async def get_documents(bot_id: str):
-    if bot_id not in bot_manager.bots:
-        raise HTTPException(status_code=404, detail="Bot not found")
-
-    bot = bot_manager.bots[bot_id]
+async def get_documents(bot: Bot = Depends(get_bot),
+                        bot_manager: BotManager = Depends(get_bot_manager)):
     try:
-        if not os.path.exists(bot.data_dir):
-            return {"documents": []}
-        documents = os.listdir(bot.data_dir)
+        documents = await bot_manager.run_blocking(
+            bot_manager.file_manager.get_directory_files, bot.data_dir)
         return {"documents": documents}
     except Exception as e:
+        logger.error(f"Error retrieving documents for bot {bot.id}: {e}")
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to retrieve documents: {str(e)}"
+            status_code=500, detail="Failed to retrieve documents"
         )
 
 
-@router.post("/upload/{bot_id}")  # Define the upload endpoint here
-async def upload_document(bot_id: str, file: UploadFile = File(...)):
-    if bot_id not in bot_manager.bots:
-        raise HTTPException(status_code=404, detail="Bot not found")
-
-    try:
-        bot = bot_manager.bots[bot_id]
-        file_path = os.path.join(bot.data_dir, file.filename)
-
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        # Update index
-        bot_manager.indices[bot_id] = bot_manager.index_manager.build_index(
-            bot)
-
-        return {"status": "success", "message": "File uploaded successfully"}
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to upload file: {str(e)}"
-        )
+@router.post("/upload/{bot_id}", status_code=202)
+async def upload_document(file: UploadFile = File(...),
+                          bot: Bot = Depends(get_bot),
+                          bot_manager: BotManager = Depends(get_bot_manager)):
+    """Same as POST /upload/{bot_id}: save the file and queue its ingestion."""
+    return await queue_uploads(bot_manager, bot, [file])
 
 
 @router.delete("/{bot_id}/{filename}")
-async def delete_document(bot_id: str, filename: str):
-    if bot_id not in bot_manager.bots:
-        raise HTTPException(status_code=404, detail="Bot not found")
-
-    bot = bot_manager.bots[bot_id]
-    file_path = os.path.join(bot.data_dir, filename)
-
-    try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            bot_manager.indices[bot_id] = bot_manager.index_manager.build_index(
-                bot)
-            return {"status": "success", "message": f"Document {filename} deleted"}
-        else:
-            raise HTTPException(status_code=404, detail="File not found")
-    except Exception as e:
+async def delete_document(filename: str, bot: Bot = Depends(get_bot),
+                          bot_manager: BotManager = Depends(get_bot_manager)):
+    """Delete a file and update the vector index for a specific bot."""
+    success = await bot_manager.run_blocking(
+        bot_manager.delete_document, bot.id, filename)
+    if not success:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to delete file: {str(e)}"
-        )
+            status_code=404, detail="File not found or error during deletion")
+
+    return {"status": f"Document '{filename}' deleted successfully"}
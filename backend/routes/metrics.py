@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from backend.routes.deps import get_bot_manager
+from backend.services.bot_manager import BotManager
+from backend.services.metrics import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency, token, ingestion and cache metrics in Prometheus text format."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/cache/embeddings")
+async def get_embedding_cache_stats(
+        bot_manager: BotManager = Depends(get_bot_manager)):
+    """Hit and miss counters of the shared embedding cache."""
+    return bot_manager.embedding_cache.stats()
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats(
+        bot_manager: BotManager = Depends(get_bot_manager)):
+    """LLM slots in use and requests waiting for one, per bot."""
+    return bot_manager.llm_scheduler.stats()
+
+
+@router.get("/cache/answers")
+async def get_answer_cache_stats(
+        bot_manager: BotManager = Depends(get_bot_manager)):
+    """Per-bot hit and miss counters of the semantic answer cache."""
+    return bot_manager.answer_cache.stats()
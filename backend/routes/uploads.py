@@ -0,0 +1,57 @@
+from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from backend.core.config import settings
+from backend.models.bot import Bot
+from backend.routes.deps import get_bot, get_bot_manager
+from backend.services.bot_manager import BotManager
+from backend.services.file_service import FileService, UploadTooLarge
+from backend.services.job_queue import JobQueueFull
+from utils import ErrorHandler
+
+router = APIRouter()
+
+
+async def queue_uploads(bot_manager: BotManager, bot: Bot,
+                        files: List[UploadFile]) -> dict:
+    """Stream uploads into the bot's data dir and queue one ingestion job."""
+    try:
+        filenames = await FileService.save_uploads(
+            files, bot.data_dir, settings.MAX_UPLOAD_BYTES)
+
+        job = bot_manager.ingestion_jobs.submit(
+            bot.id, filenames, bot_manager.ingest)
+
+        return {"status": "Files uploaded, indexing queued", "job_id": job.id}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise ErrorHandler.handle_api_error("upload file", e, bot.id)
+
+
+@router.post("/upload/{bot_id}", status_code=202)
+async def upload_file(file: UploadFile = File(...), bot: Bot = Depends(get_bot),
+                      bot_manager: BotManager = Depends(get_bot_manager)):
+    """Save a file and queue its ingestion; poll /jobs/{job_id} for progress."""
+    return await queue_uploads(bot_manager, bot, [file])
+
+
+@router.post("/upload/{bot_id}/batch", status_code=202)
+async def upload_files(files: List[UploadFile] = File(...),
+                       bot: Bot = Depends(get_bot),
+                       bot_manager: BotManager = Depends(get_bot_manager)):
+    """Save several files and ingest them together in a single job."""
+    return await queue_uploads(bot_manager, bot, files)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str,
+                  bot_manager: BotManager = Depends(get_bot_manager)):
+    """State, embedded chunk count and elapsed time of an ingestion job."""
+    job = bot_manager.ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -0,0 +1,125 @@
+# backend/services/answer_cache.py
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.keyword_index import cited_articles
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def exact_terms(query: str) -> Tuple[tuple, tuple]:
+    """The articles a query cites and the numbers it contains.
+
+    Questions about different articles ("artículo 79", "artículo 80") can
+    have near-identical embeddings, so a cached answer is only reused for a
+    query with the same exact terms.
+    """
+    numbers = sorted(str(int(number)) for number in _NUMBER_RE.findall(query))
+    return tuple(cited_articles(query)), tuple(numbers)
+
+
+class _BotAnswers:
+    """Cached answers of one bot, valid for a single index version."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.vectors: List[np.ndarray] = []
+        self.terms: List[tuple] = []
+        self.answers: List[dict] = []
+        self.last_used: List[int] = []
+        self.matrix: Optional[np.ndarray] = None
+
+
+class SemanticAnswerCache:
+    """Answers to earlier questions, matched by query embedding similarity.
+
+    A lookup returns the cached answer whose query embedding has the highest
+    cosine similarity with the new query, provided it reaches threshold and
+    both queries have the same exact_terms.
+    Each bot keeps at most max_entries answers, evicting the least recently
+    used, and its answers are discarded whenever its index version changes.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 500):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._bots: Dict[str, _BotAnswers] = {}
+        self._clock = 0
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def lookup(self, bot_id: str, version: int, embedding,
+               terms: tuple = ()) -> Optional[dict]:
+        query = self._normalize(embedding)
+        with self._lock:
+            entries = self._entries(bot_id, version)
+            if entries is not None and entries.answers:
+                if entries.matrix is None:
+                    entries.matrix = np.vstack(entries.vectors)
+                scores = entries.matrix @ query
+                scores[[other != terms for other in entries.terms]] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._clock += 1
+                    entries.last_used[best] = self._clock
+                    self.hits[bot_id] += 1
+                    return entries.answers[best]
+            self.misses[bot_id] += 1
+            return None
+
+    def store(self, bot_id: str, version: int, embedding, answer: dict,
+              terms: tuple = ()) -> None:
+        vector = self._normalize(embedding)
+        with self._lock:
+            entries = self._entries(bot_id, version)
+            if entries is None:
+                return
+            if len(entries.answers) >= self.max_entries:
+                oldest = int(np.argmin(entries.last_used))
+                for values in (entries.vectors, entries.terms, entries.answers,
+                               entries.last_used):
+                    del values[oldest]
+            self._clock += 1
+            entries.vectors.append(vector)
+            entries.terms.append(terms)
+            entries.answers.append(answer)
+            entries.last_used.append(self._clock)
+            entries.matrix = None
+
+    def invalidate(self, bot_id: str) -> None:
+        with self._lock:
+            self._bots.pop(bot_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for bot_id in set(self.hits) | set(self.misses) | set(self._bots):
+                hits, misses = self.hits[bot_id], self.misses[bot_id]
+                entries = self._bots.get(bot_id)
+                stats[bot_id] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                    "entries": len(entries.answers) if entries else 0,
+                }
+            return stats
+
+    def _entries(self, bot_id: str, version: int) -> Optional[_BotAnswers]:
+        """Answers for this index version, or None if a newer one is cached."""
+        entries = self._bots.get(bot_id)
+        if entries is None or entries.version < version:
+            entries = self._bots[bot_id] = _BotAnswers(version)
+        elif entries.version > version:
+            return None
+        return entries
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
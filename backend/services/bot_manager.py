@@ -1,34 +1,472 @@
 # backend/services/bot_manager.py
+import asyncio
+import logging
 import os
-from typing import Dict
-from llama_index.core import VectorStoreIndex  # Add this import
+import shutil
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional
+
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.llms import ChatMessage, MessageRole
 from llama_index.core.memory import ChatMemoryBuffer
-from backend.models.bot import Bot
+
+from backend.core.chroma_manager import ChromaManager
 from backend.core.config import settings
+from backend.models.bot import Bot, BotUpdate, default_data_dir
+from backend.services.answer_cache import SemanticAnswerCache, exact_terms
+from backend.services.bot_registry import BotExists, BotRegistry
+from backend.services.chat_engine_cache import ChatEngineCache
+from backend.services.embedding_cache import EmbeddingCache, install_embedding_cache
 from backend.services.index_manager import IndexManager
-from backend.core.chroma_manager import ChromaManager
+from backend.services.job_queue import IngestionJob, IngestionJobQueue
+from backend.services.llm_scheduler import LLMScheduler
+from backend.services.memory_store import ChatMemoryStore, SummarizingMemory
+from backend.services.metrics import CACHE_LOOKUPS, current_bot
+from utils import ConfigManager, ErrorHandler, FileManager
+
+logger = logging.getLogger(__name__)
 
 
 class BotManager:
+    """Centralizes bot initialization and management.
+
+    One instance is created per app by its lifespan and shared by every
+    route through FastAPI dependencies. Bot definitions come from the bot
+    registry; their indices are opened on first use and at most
+    MAX_LIVE_BOTS stay open, the least recently used being closed first and
+    any unused for BOT_IDLE_TTL seconds being closed by unload_idle_bots.
+    Closing an index frees its LlamaIndex wrappers, not Chroma's memory.
+    """
+
     def __init__(self):
-        self.chroma = ChromaManager(settings.CHROMA_DIR)
-        self.index_manager = IndexManager(self.chroma)
-        self.bots = self._initialize_bots()
-        self.indices: Dict[str, VectorStoreIndex] = {}
-        self.memories: Dict[str, ChatMemoryBuffer] = {}
-        self._initialize_all()
-
-    def _initialize_bots(self):
-        return {
-            bot_id: Bot(
-                id=bot_id,
-                **config
-            ) for bot_id, config in settings.BOT_CONFIG.items()
-        }
-
-    def _initialize_all(self):
-        for bot in self.bots.values():
-            os.makedirs(bot.data_dir, exist_ok=True)
-            self.memories[bot.id] = ChatMemoryBuffer.from_defaults(
-                token_limit=2000)
-            self.indices[bot.id] = self.index_manager.build_index(bot)
+        self.chroma_manager = ChromaManager(settings.CHROMA_DIR)
+        self.index_manager = IndexManager(self.chroma_manager)
+        self.file_manager = FileManager()
+        self.error_handler = ErrorHandler()
+
+        # Shared by all bots: re-indexing unchanged text makes no API calls
+        self.embedding_cache = install_embedding_cache(EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+        ), query_cache_size=settings.QUERY_EMBEDDING_CACHE_SIZE).cache
+
+        # Load bot configurations
+        self.registry = BotRegistry(
+            settings.BOT_REGISTRY_PATH, seed=ConfigManager.load_bot_config())
+        self.bots: Dict[str, Bot] = self.registry.load_all()
+
+        # Open indices in least recently used order, with their last use
+        self.indices: "OrderedDict[str, Optional[VectorStoreIndex]]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._indices_lock = threading.Lock()
+        # Bumped whenever a bot's index changes so cached engines are rebuilt
+        self.index_versions: Dict[str, int] = {}
+        # Shared index version each open index was built at, and when it was
+        # last compared with the one other workers bump after writing
+        self._opened_version: Dict[str, int] = {}
+        self._version_checked: Dict[str, float] = {}
+        self.engine_cache = ChatEngineCache(
+            similarity_top_k=settings.RETRIEVAL_CANDIDATES,
+            context_chunks=settings.CONTEXT_MAX_CHUNKS,
+            context_token_budget=settings.CONTEXT_TOKEN_BUDGET,
+            keyword_index=(self.index_manager.keyword_index
+                           if settings.HYBRID_RETRIEVAL else None),
+            vector_timeout=settings.VECTOR_RETRIEVAL_TIMEOUT
+        )
+        # Opt-in per bot (Bot.answer_cache): answers to repeated questions
+        self.answer_cache = SemanticAnswerCache(
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES
+        )
+        # One memory per (bot, conversation), bounded by LRU and idle TTL
+        self.memory_store = ChatMemoryStore(
+            max_sessions=settings.MAX_CHAT_SESSIONS,
+            idle_ttl=settings.CHAT_SESSION_TTL,
+            token_limit=settings.CHAT_MEMORY_TOKEN_LIMIT,
+            spill_path=settings.CHAT_SESSION_SPILL_PATH,
+            summarize=settings.CHAT_MEMORY_SUMMARY,
+            recent_messages=2 * settings.CHAT_RECENT_TURNS,
+            summary_max_words=settings.CHAT_SUMMARY_MAX_WORDS
+        )
+        self.ingestion_jobs = IngestionJobQueue(
+            max_workers=settings.INGESTION_WORKERS,
+            max_pending=settings.INGESTION_MAX_PENDING,
+            store_path=settings.JOB_STORE_PATH
+        )
+        self._open_locks = defaultdict(threading.Lock)
+        # Every chat request waits here for its turn at the LLM
+        self.llm_scheduler = LLMScheduler(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            per_bot_concurrency=settings.LLM_MAX_CONCURRENCY_PER_BOT,
+            max_queue=settings.LLM_MAX_QUEUE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT
+        )
+
+        # Blocking index and filesystem work runs here, off the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.BLOCKING_WORKERS,
+            thread_name_prefix="blocking"
+        )
+
+    async def run_blocking(self, fn, *args):
+        """Run a blocking call on the BotManager's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args))
+
+    async def open_all_bots(self) -> None:
+        """Open as many bots' indices as may stay open, all at the same time."""
+        bot_ids = list(self.bots)[:settings.MAX_LIVE_BOTS]
+        await asyncio.gather(*(
+            self.run_blocking(self.get_index, bot_id) for bot_id in bot_ids
+        ))
+
+    async def run_idle_reaper(self, interval: float) -> None:
+        """Close idle bots' indices every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.unload_idle_bots()
+            await self.run_blocking(self.reload_bots)
+
+    def shutdown(self) -> None:
+        """Release threads, worker processes and database connections.
+
+        Ingestion jobs that already started are allowed to finish so their
+        manifests and collections are left consistent; queued ones are dropped.
+        """
+        self.ingestion_jobs.shutdown(wait=True)
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.index_manager.close()
+        self.chroma_manager.close()
+        self.memory_store.close()
+        self.embedding_cache.close()
+        self.registry.close()
+
+    def get_index(self, bot_id: str) -> Optional[VectorStoreIndex]:
+        """Return a bot's index, opening it on first use and reattaching it
+        once another worker has changed it."""
+        if bot_id not in self.indices or self._is_stale(bot_id):
+            with self._open_locks[bot_id]:
+                if bot_id not in self.indices:
+                    self.initialize_single_bot(self.bots[bot_id])
+                elif self._is_stale(bot_id, throttle=False):
+                    self.reattach_bot(self.bots[bot_id])
+        with self._indices_lock:
+            if bot_id in self.indices:
+                self.indices.move_to_end(bot_id)
+                self._last_used[bot_id] = time.monotonic()
+            return self.indices.get(bot_id)
+
+    def initialize_single_bot(self, bot: Bot) -> None:
+        """Initialize a single bot's components."""
+        try:
+            # Ensure bot directory exists
+            self.file_manager.ensure_directory(bot.data_dir)
+
+            # Another worker wrote this collection since this process read
+            # it: open a new Chroma client so the new data is seen
+            opened = self._opened_version.get(bot.id)
+            if (opened is not None
+                    and opened != self.index_manager.versions.get(bot.id)):
+                self.refresh_chroma()
+
+            # Reattach to the persisted collection; only new or changed
+            # files are parsed and embedded
+            self.set_index(bot.id, self.index_manager.build_index(bot))
+            self._opened_version[bot.id] = \
+                self.index_manager.synced_versions.get(bot.id, 0)
+
+            logger.info(f"Bot {bot.id} initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize bot {bot.id}: {e}")
+            self.set_index(bot.id, None)
+
+    def _is_stale(self, bot_id: str, throttle: bool = True) -> bool:
+        """Whether another worker changed the bot's index since it was opened.
+
+        The shared version is read at most once per
+        INDEX_VERSION_CHECK_INTERVAL seconds per bot unless throttle is off.
+        """
+        opened = self._opened_version.get(bot_id)
+        if opened is None:
+            return False
+        now = time.monotonic()
+        if (throttle and now - self._version_checked.get(bot_id, 0.0)
+                < settings.INDEX_VERSION_CHECK_INTERVAL):
+            return False
+        self._version_checked[bot_id] = now
+        return self.index_manager.versions.get(bot_id) != opened
+
+    def reattach_bot(self, bot: Bot) -> None:
+        """Pick up a collection another worker changed, without syncing it.
+
+        The writer already updated the manifest and vectors, so this only
+        reads the collection again: no file lock is taken and nothing is
+        parsed or embedded. Only this bot's cached engines and answers are
+        invalidated.
+        """
+        # Read first: a write landing meanwhile makes the bot stale again
+        version = self.index_manager.versions.get(bot.id)
+        try:
+            self.refresh_chroma()
+            self.set_index(bot.id, self.index_manager.open_index(bot))
+            self._opened_version[bot.id] = version
+            logger.info(f"Bot {bot.id} reattached at index version {version}")
+        except Exception as e:
+            logger.error(f"Failed to reattach bot {bot.id}: {e}")
+
+    def refresh_chroma(self) -> None:
+        """Open a new Chroma client and move the open indices onto it.
+
+        The other bots' indices, engines and cached answers stay valid:
+        their collections are only swapped for handles on the new client.
+        """
+        logger.info("Index changed by another worker, reopening Chroma client")
+        self.chroma_manager.refresh()
+        with self._indices_lock:
+            open_indices = [(bot_id, index) for bot_id, index
+                            in self.indices.items() if index is not None]
+        for bot_id, index in open_indices:
+            if bot_id in self.bots:
+                self.index_manager.rebind(self.bots[bot_id], index)
+
+    def set_index(self, bot_id: str, index: Optional[VectorStoreIndex]) -> None:
+        """Publish a bot's index and invalidate what was cached for the old one."""
+        with self._indices_lock:
+            self.indices[bot_id] = index
+            self.indices.move_to_end(bot_id)
+            self._last_used[bot_id] = time.monotonic()
+            self.index_versions[bot_id] = self.index_versions.get(bot_id, 0) + 1
+            excess = len(self.indices) - settings.MAX_LIVE_BOTS
+            evicted = list(self.indices)[:max(0, excess)]
+        self.engine_cache.invalidate(bot_id)
+        self.answer_cache.invalidate(bot_id)
+        for evicted_id in evicted:
+            self.unload_bot(evicted_id)
+
+    def unload_bot(self, bot_id: str) -> None:
+        """Close a bot's index; it is reopened from Chroma on next use.
+
+        This only frees the LlamaIndex objects and cached engines built for
+        the bot: the Chroma client keeps its collection loaded as it sees
+        fit. Requests already holding its chat engine finish normally. Chat
+        memories are bounded by the memory store and are left alone.
+        """
+        with self._indices_lock:
+            if bot_id not in self.indices:
+                return
+            del self.indices[bot_id]
+            self._last_used.pop(bot_id, None)
+        self.engine_cache.invalidate(bot_id)
+        self.answer_cache.invalidate(bot_id)
+        logger.info(f"Bot {bot_id} unloaded")
+
+    def unload_idle_bots(self) -> None:
+        """Close the indices of bots unused for BOT_IDLE_TTL seconds."""
+        deadline = time.monotonic() - settings.BOT_IDLE_TTL
+        with self._indices_lock:
+            idle = [bot_id for bot_id, last_used in self._last_used.items()
+                    if last_used < deadline]
+        for bot_id in idle:
+            self.unload_bot(bot_id)
+
+    def create_bot(self, bot: Bot) -> Bot:
+        """Register a bot; its index opens on first use.
+
+        Raises BotExists when the ID is taken, or when the bot's data
+        directory or collection already belongs to another bot or its data
+        directory already holds files, so purging it can never remove
+        anything it did not create.
+        """
+        data_dir = os.path.abspath(bot.data_dir)
+        for other in self.registry.load_all().values():
+            if other.id == bot.id:
+                raise BotExists(f"Bot {bot.id} already exists")
+            if (os.path.abspath(other.data_dir) == data_dir
+                    or other.collection_name == bot.collection_name):
+                raise BotExists(
+                    f"Bot {other.id} already uses the storage of bot {bot.id}")
+        if os.path.isdir(data_dir) and os.listdir(data_dir):
+            raise BotExists(f"Data directory {bot.data_dir} is not empty")
+        self.registry.create(bot)
+        self.file_manager.ensure_directory(bot.data_dir)
+        self.bots[bot.id] = bot
+        return bot
+
+    def reload_bots(self) -> None:
+        """Pick up bots created, changed or deleted by other worker processes."""
+        bots = self.registry.load_all()
+        for bot_id, bot in list(self.bots.items()):
+            if bot_id not in bots:
+                self.unload_bot(bot_id)
+            elif bots[bot_id] != bot:
+                self.engine_cache.invalidate(bot_id)
+                self.answer_cache.invalidate(bot_id)
+        self.bots = bots
+
+    def update_bot(self, bot_id: str, changes: BotUpdate) -> Bot:
+        """Change a bot's name, description, prompt, answer cache setting,
+        context token budget or LLM weight."""
+        bot = self.bots[bot_id].model_copy(
+            update=changes.model_dump(exclude_none=True))
+        self.registry.update(bot)
+        self.bots[bot_id] = bot
+        # Cached engines and answers were built with the old prompt
+        self.engine_cache.invalidate(bot_id)
+        self.answer_cache.invalidate(bot_id)
+        return bot
+
+    def delete_bot(self, bot_id: str, purge: bool = False) -> None:
+        """Unregister a bot; with purge, also drop its vectors and files.
+
+        Only data directories of bots created through the API are deleted;
+        those of configured bots are left where the configuration put them.
+        """
+        bot = self.bots.pop(bot_id)
+        self.registry.delete(bot_id)
+        self.unload_bot(bot_id)
+        self.memory_store.reset(bot_id)
+        if purge:
+            self.index_manager.purge(bot)
+            if bot.managed and os.path.abspath(bot.data_dir) == \
+                    os.path.abspath(default_data_dir(bot.id)):
+                shutil.rmtree(bot.data_dir, ignore_errors=True)
+            else:
+                logger.info(
+                    f"Bot {bot_id} purged; data directory {bot.data_dir} kept")
+
+    def get_chat_engine(self, bot_id: str, session_id: str):
+        """Build a chat engine that retrieves context before answering.
+
+        The retriever and prompts come from the engine cache, so this only
+        attaches the conversation's memory. condense_plus_context retrieves up
+        front, so sources are known before the first token is generated and
+        streaming can report them first.
+        """
+        return self._build_engine(
+            bot_id, self.get_index(bot_id),
+            lambda: self.memory_store.get(bot_id, session_id))
+
+    async def aget_chat_engine(self, bot_id: str, session_id: str):
+        """get_chat_engine, opening the bot's index off the event loop if needed."""
+        return self._build_engine(
+            bot_id, await self.aget_index(bot_id),
+            lambda: self.memory_store.get(bot_id, session_id))
+
+    def get_stateless_chat_engine(self, bot_id: str):
+        """Chat engine with a throwaway memory, for independent questions."""
+        return self._build_engine(
+            bot_id, self.get_index(bot_id), self._throwaway_memory)
+
+    async def aget_stateless_chat_engine(self, bot_id: str):
+        return self._build_engine(
+            bot_id, await self.aget_index(bot_id), self._throwaway_memory)
+
+    async def aget_index(self, bot_id: str) -> Optional[VectorStoreIndex]:
+        """get_index for the event loop: an index that is open and current
+        is returned in place, opening or reopening one runs on the thread pool."""
+        if not self._is_stale(bot_id):
+            with self._indices_lock:
+                if bot_id in self.indices:
+                    self.indices.move_to_end(bot_id)
+                    self._last_used[bot_id] = time.monotonic()
+                    return self.indices[bot_id]
+        return await self.run_blocking(self.get_index, bot_id)
+
+    def _throwaway_memory(self) -> ChatMemoryBuffer:
+        return ChatMemoryBuffer.from_defaults(
+            token_limit=self.memory_store.token_limit)
+
+    def _build_engine(self, bot_id: str, index: Optional[VectorStoreIndex],
+                      memory_factory):
+        if index is None:
+            return None
+        # Labels the retrieval, LLM and embedding metrics of this request
+        current_bot.set(bot_id)
+        return self.engine_cache.get_engine(
+            self.bots[bot_id], index, self.index_versions[bot_id],
+            memory_factory())
+
+    async def find_cached_answer(self, bot_id: str, query: str, memory):
+        """Look a question up in the bot's semantic answer cache.
+
+        Returns (cached answer or None, key to store a fresh answer under).
+        Bots without answer_cache, turns that depend on earlier messages and
+        queries whose embedding times out skip the cache and get (None, None).
+        """
+        if not self.bots[bot_id].answer_cache or memory.get_all():
+            return None, None
+        version = self.index_versions[bot_id]
+        try:
+            # Must not hold up the keyword fallback of a slow vector retrieval
+            embedding = await asyncio.wait_for(
+                Settings.embed_model.aget_query_embedding(query),
+                settings.VECTOR_RETRIEVAL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Query embedding for bot {bot_id} took over "
+                f"{settings.VECTOR_RETRIEVAL_TIMEOUT}s; skipping the answer cache")
+            return None, None
+        terms = exact_terms(query)
+        cached = self.answer_cache.lookup(bot_id, version, embedding, terms)
+        CACHE_LOOKUPS.inc(cache="answer", bot=bot_id,
+                          result="miss" if cached is None else "hit")
+        return cached, (version, embedding, terms)
+
+    def cache_answer(self, bot_id: str, cache_key, response: str,
+                     sources: List[dict]) -> None:
+        if cache_key is None:
+            return
+        version, embedding, terms = cache_key
+        self.answer_cache.store(
+            bot_id, version, embedding,
+            {"response": response, "sources": sources}, terms)
+
+    @staticmethod
+    def remember_turn(memory, query: str, response: str) -> None:
+        """Record a turn answered without the chat engine."""
+        memory.put(ChatMessage(role=MessageRole.USER, content=query))
+        memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=response))
+
+    @staticmethod
+    async def summarize_memory(bot_id: str, memory) -> None:
+        """Fold a conversation's older turns into its summary.
+
+        Run as a background task once the reply has been sent, so the LLM
+        call never delays a response; failures only leave more history.
+        """
+        if not isinstance(memory, SummarizingMemory) or not memory.needs_compaction():
+            return
+        current_bot.set(bot_id)
+        try:
+            await memory.acompact(Settings.llm)
+        except Exception as e:
+            logger.warning(f"Could not summarize chat memory of bot {bot_id}: {e}")
+
+    def delete_document(self, bot_id: str, filename: str) -> bool:
+        """Delete a document and its vectors, leaving other files untouched."""
+        bot = self.bots[bot_id]
+        self.get_index(bot_id)
+        if not self.index_manager.delete_document(bot, filename):
+            return False
+        self._opened_version[bot_id] = \
+            self.index_manager.synced_versions.get(bot_id, 0)
+        if self.file_manager.get_directory_files(bot.data_dir):
+            self.set_index(bot_id, self.indices.get(bot_id))
+        else:
+            self.set_index(bot_id, None)
+        return True
+
+    def ingest(self, job: IngestionJob) -> None:
+        """Ingestion job body: sync a bot's index with its data directory."""
+        bot = self.bots[job.bot_id]
+        index = self.index_manager.build_index(
+            bot, on_progress=partial(self.ingestion_jobs.report_progress, job))
+        if index is None:
+            raise Exception("Failed to build index")
+        self.set_index(bot.id, index)
+        self._opened_version[bot.id] = \
+            self.index_manager.synced_versions.get(bot.id, 0)
@@ -0,0 +1,73 @@
+# backend/services/bot_registry.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.models.bot import Bot
+
+logger = logging.getLogger(__name__)
+
+
+class BotExists(Exception):
+    """Raised when creating a bot whose ID is already registered."""
+
+
+class BotRegistry:
+    """SQLite-backed store of bot definitions.
+
+    A new registry is seeded with the bots of the configuration, so existing
+    deployments keep their bots; afterwards the registry is the only source
+    of truth and bots are managed through the /bots endpoints.
+    """
+
+    def __init__(self, path: str, seed: Optional[Dict[str, dict]] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bots ("
+            "id TEXT PRIMARY KEY, config TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+        if seed and not self.load_all():
+            for config in seed.values():
+                self.create(Bot(**config))
+            logger.info(f"Seeded bot registry with {len(seed)} bot(s)")
+
+    def load_all(self) -> Dict[str, Bot]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT config FROM bots ORDER BY id").fetchall()
+        bots = (Bot.model_validate_json(row[0]) for row in rows)
+        return {bot.id: bot for bot in bots}
+
+    def create(self, bot: Bot) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT INTO bots (id, config, updated_at) VALUES (?, ?, ?)",
+                    (bot.id, bot.model_dump_json(), time.time()))
+                self._conn.commit()
+            except sqlite3.IntegrityError:
+                raise BotExists(f"Bot {bot.id} already exists")
+
+    def update(self, bot: Bot) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bots SET config = ?, updated_at = ? WHERE id = ?",
+                (bot.model_dump_json(), time.time(), bot.id))
+            self._conn.commit()
+
+    def delete(self, bot_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM bots WHERE id = ?", (bot_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
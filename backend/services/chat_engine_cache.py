@@ -0,0 +1,87 @@
+# backend/services/chat_engine_cache.py
+import threading
+from typing import Dict, Optional, Tuple
+
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.chat_engine import CondensePlusContextChatEngine
+from llama_index.core.chat_engine.condense_plus_context import (
+    DEFAULT_CONDENSE_PROMPT_TEMPLATE,
+    DEFAULT_CONTEXT_PROMPT_TEMPLATE,
+    DEFAULT_CONTEXT_REFINE_PROMPT_TEMPLATE,
+)
+from llama_index.core.memory import BaseMemory
+from llama_index.core.prompts import PromptTemplate
+
+from backend.services.context_budget import ContextBudget
+from backend.services.hybrid_retriever import HybridRetriever
+from backend.services.keyword_index import KeywordIndex
+
+
+class ChatEngineCache:
+    """Reuses each bot's retriever and prompt templates across requests.
+
+    Retrievers are tagged with the version of the bot's index and rebuilt
+    when an upload or delete bumps it. Creating the engine for a request only
+    attaches the conversation's memory to these cached parts; the response
+    synthesizer still depends on that conversation's history, so the engine
+    builds it per message. With a keyword index, retrievers also search it
+    and fuse its results with the vector ones.
+
+    Retrievers fetch similarity_top_k candidates; at most context_chunks of
+    them, within the bot's context token budget, are sent to the LLM.
+    """
+
+    def __init__(self, similarity_top_k: int = 3,
+                 keyword_index: Optional[KeywordIndex] = None,
+                 vector_timeout: float = 3.0, context_chunks: int = 3,
+                 context_token_budget: int = 1500):
+        self.similarity_top_k = similarity_top_k
+        self.context_chunks = context_chunks
+        self.context_token_budget = context_token_budget
+        self.keyword_index = keyword_index
+        self.vector_timeout = vector_timeout
+        self._lock = threading.Lock()
+        self._retrievers: Dict[str, Tuple[int, BaseRetriever]] = {}
+        self._context_prompt = PromptTemplate(DEFAULT_CONTEXT_PROMPT_TEMPLATE)
+        self._context_refine_prompt = PromptTemplate(
+            DEFAULT_CONTEXT_REFINE_PROMPT_TEMPLATE)
+        self._condense_prompt = PromptTemplate(DEFAULT_CONDENSE_PROMPT_TEMPLATE)
+
+    def get_engine(self, bot, index: VectorStoreIndex, version: int,
+                   memory: BaseMemory) -> CondensePlusContextChatEngine:
+        return CondensePlusContextChatEngine(
+            retriever=self.get_retriever(bot.id, index, version),
+            llm=Settings.llm,
+            memory=memory,
+            context_prompt=self._context_prompt,
+            context_refine_prompt=self._context_refine_prompt,
+            condense_prompt=self._condense_prompt,
+            system_prompt=bot.system_prompt,
+            node_postprocessors=[ContextBudget(
+                bot.id,
+                token_budget=bot.context_token_budget or self.context_token_budget,
+                top_n=self.context_chunks)],
+            callback_manager=Settings.callback_manager
+        )
+
+    def get_retriever(self, bot_id: str, index: VectorStoreIndex,
+                      version: int) -> BaseRetriever:
+        with self._lock:
+            cached = self._retrievers.get(bot_id)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            retriever = index.as_retriever(
+                similarity_top_k=self.similarity_top_k)
+            if self.keyword_index is not None:
+                retriever = HybridRetriever(
+                    bot_id, retriever, self.keyword_index,
+                    similarity_top_k=self.similarity_top_k,
+                    vector_timeout=self.vector_timeout)
+            self._retrievers[bot_id] = (version, retriever)
+            return retriever
+
+    def invalidate(self, bot_id: str) -> None:
+        with self._lock:
+            self._retrievers.pop(bot_id, None)
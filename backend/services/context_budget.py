@@ -0,0 +1,164 @@
+# backend/services/context_budget.py
+import logging
+import math
+import re
+import unicodedata
+from typing import Callable, List, Optional, Set
+
+from llama_index.core import Settings
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+
+from backend.services.metrics import CONTEXT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+# Sentence ends, semicolons and line breaks; numbered clauses of legal texts
+# usually end in one of them
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+# Words this short are mostly articles and prepositions ("el", "de", "la")
+_MIN_TERM_LENGTH = 3
+# Weight of query term overlap against the retriever's own order
+LEXICAL_WEIGHT = 0.7
+# Chunks sharing this fraction of their word trigrams count as duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+
+def _terms(text: str) -> List[str]:
+    """Lowercased words without accents, so "artículo" matches "articulo"."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _WORD_RE.findall(folded)
+
+
+def _shingles(words: List[str]) -> Set[tuple]:
+    return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+
+class ContextBudget(BaseNodePostprocessor):
+    """Fits retrieved chunks into a token budget before they reach the LLM.
+
+    Candidates are reranked by how much of the query's vocabulary they
+    contain, weighted by how rare each word is among the candidates, mixed
+    with the retriever's order. Near-duplicate chunks are dropped and at most
+    top_n are kept. While the context is over budget, sentences that share
+    no word with the query are trimmed from the least relevant chunks first,
+    then the least relevant chunks are dropped.
+    """
+
+    bot_id: str = Field(description="Bot whose context is assembled.")
+    token_budget: int = Field(description="Maximum tokens of retrieved context.")
+    top_n: int = Field(default=5, description="Maximum chunks kept.")
+    _tokenizer: Callable = PrivateAttr()
+
+    def __init__(self, bot_id: str, token_budget: int, top_n: int = 5,
+                 tokenizer: Optional[Callable] = None):
+        super().__init__(bot_id=bot_id, token_budget=token_budget, top_n=top_n)
+        self._tokenizer = tokenizer or Settings.tokenizer
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextBudget"
+
+    def _postprocess_nodes(self, nodes: List[NodeWithScore],
+                           query_bundle: Optional[QueryBundle] = None
+                           ) -> List[NodeWithScore]:
+        if not nodes or query_bundle is None:
+            return nodes
+        query_terms = {term for term in _terms(query_bundle.query_str)
+                       if len(term) >= _MIN_TERM_LENGTH}
+        retrieved = sum(self._count(node) for node in nodes)
+
+        kept = self._deduplicate(self._rerank(nodes, query_terms))[:self.top_n]
+        sizes = [self._count(node) for node in kept]
+
+        # Trim the least relevant chunks first
+        for i in reversed(range(len(kept))):
+            if sum(sizes) <= self.token_budget:
+                break
+            compressed = self._compress(kept[i], query_terms)
+            if compressed is not None:
+                kept[i] = compressed
+                sizes[i] = self._count(compressed)
+        while len(kept) > 1 and sum(sizes) > self.token_budget:
+            kept.pop()
+            sizes.pop()
+        if kept and sizes[0] > self.token_budget:
+            kept[0] = self._truncate(kept[0])
+            sizes[0] = self._count(kept[0])
+
+        sent = sum(sizes)
+        CONTEXT_TOKENS.inc(retrieved, bot=self.bot_id, kind="retrieved")
+        CONTEXT_TOKENS.inc(sent, bot=self.bot_id, kind="sent")
+        logger.info(
+            f"Context for bot {self.bot_id}: {len(nodes)} chunks with "
+            f"{retrieved} tokens retrieved, {len(kept)} with {sent} sent "
+            f"({retrieved - sent} saved, budget {self.token_budget})")
+        return kept
+
+    def _count(self, node: NodeWithScore) -> int:
+        return len(self._tokenizer(
+            node.node.get_content(metadata_mode=MetadataMode.LLM)))
+
+    def _rerank(self, nodes: List[NodeWithScore],
+                query_terms: Set[str]) -> List[NodeWithScore]:
+        if not query_terms:
+            return list(nodes)
+        node_terms = [set(_terms(node.node.get_content())) for node in nodes]
+        idf = {
+            term: math.log(1 + len(nodes) / (1 + sum(term in terms
+                                                      for terms in node_terms)))
+            for term in query_terms
+        }
+        total = sum(idf.values()) or 1.0
+        scored = []
+        for rank, (node, terms) in enumerate(zip(nodes, node_terms)):
+            lexical = sum(idf[term] for term in query_terms & terms) / total
+            prior = 1.0 - rank / len(nodes)
+            score = LEXICAL_WEIGHT * lexical + (1 - LEXICAL_WEIGHT) * prior
+            scored.append(NodeWithScore(node=node.node, score=score))
+        scored.sort(key=lambda node: node.score, reverse=True)
+        return scored
+
+    @staticmethod
+    def _deduplicate(nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        kept, kept_shingles = [], []
+        for node in nodes:
+            shingles = _shingles(_terms(node.node.get_content()))
+            if any(len(shingles & other) / len(shingles | other)
+                   >= DUPLICATE_THRESHOLD for other in kept_shingles):
+                continue
+            kept.append(node)
+            kept_shingles.append(shingles)
+        return kept
+
+    @staticmethod
+    def _with_text(node: NodeWithScore, text: str) -> NodeWithScore:
+        copy = node.node.model_copy()
+        copy.set_content(text)
+        return NodeWithScore(node=copy, score=node.score)
+
+    def _compress(self, node: NodeWithScore,
+                  query_terms: Set[str]) -> Optional[NodeWithScore]:
+        """The chunk with only its sentences that share a word with the
+        query, or None when every sentence does or none does."""
+        sentences = [s for s in _SENTENCE_RE.split(node.node.get_content()) if s]
+        matching = [s for s in sentences if query_terms & set(_terms(s))]
+        if not matching or len(matching) == len(sentences):
+            return None
+        return self._with_text(node, " ".join(matching))
+
+    def _truncate(self, node: NodeWithScore) -> NodeWithScore:
+        """The chunk's leading sentences that fit in the budget."""
+        overhead = self._count(node) - len(self._tokenizer(node.node.get_content()))
+        remaining = self.token_budget - overhead
+        kept = []
+        for sentence in _SENTENCE_RE.split(node.node.get_content()):
+            size = len(self._tokenizer(sentence)) + 1
+            if size > remaining and kept:
+                break
+            kept.append(sentence)
+            remaining -= size
+        return self._with_text(node, " ".join(kept))
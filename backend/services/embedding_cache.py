@@ -0,0 +1,278 @@
+# backend/services/embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from pydantic import PrivateAttr
+
+from backend.services.metrics import (
+    CACHE_LOOKUPS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_SECONDS,
+    current_bot,
+)
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """SQLite-backed store of chunk embeddings shared by every bot.
+
+    Entries are keyed by model name plus a hash of the whitespace-normalized
+    chunk text, and the least recently used ones are evicted once the cache
+    grows past max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used "
+            "ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(
+            f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[Embedding]]:
+        """Look up embeddings for texts, returning None for every miss."""
+        keys = [self.make_key(model_name, text) for text in texts]
+        found: Dict[str, Embedding] = {}
+
+        with self._lock:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embeddings "
+                    f"WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? "
+                        f"WHERE key IN ({placeholders})", [time.time(), *batch]
+                    )
+            self._conn.commit()
+
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, model_name: str, texts: List[str],
+                 embeddings: List[Embedding]) -> None:
+        now = time.time()
+        rows = [
+            (self.make_key(model_name, text),
+             array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) "
+                "VALUES (?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> None:
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+
+class QueryEmbeddingLRU:
+    """In-process LRU of query embeddings, keyed by model and normalized query.
+
+    Repeated questions skip the embedding round trip; unlike chunk
+    embeddings they are cheap to lose, so they are not persisted.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Embedding]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model_name: str, query: str) -> tuple:
+        return model_name, " ".join(query.split())
+
+    def get(self, model_name: str, query: str) -> Optional[Embedding]:
+        key = self.make_key(model_name, query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+            return embedding
+
+    def put(self, model_name: str, query: str, embedding: Embedding) -> None:
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(model_name, query)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model wrapper that only sends cache misses to the provider."""
+
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _query_cache: QueryEmbeddingLRU = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache: EmbeddingCache,
+                 query_cache_size: int = 2048, **kwargs):
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            callback_manager=embed_model.callback_manager,
+            **kwargs
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+        self._query_cache = QueryEmbeddingLRU(query_cache_size)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        embedding = self._cached_query(query)
+        if embedding is None:
+            with EMBEDDING_SECONDS.time(bot=current_bot.get(), kind="query"):
+                embedding = self._embed_model._get_query_embedding(query)
+            self._query_cache.put(self.model_name, query, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        embedding = self._cached_query(query)
+        if embedding is None:
+            with EMBEDDING_SECONDS.time(bot=current_bot.get(), kind="query"):
+                embedding = await self._embed_model._aget_query_embedding(query)
+            self._query_cache.put(self.model_name, query, embedding)
+        return embedding
+
+    def _cached_query(self, query: str) -> Optional[Embedding]:
+        embedding = self._query_cache.get(self.model_name, query)
+        CACHE_LOOKUPS.inc(cache="query_embedding", bot=current_bot.get(),
+                          result="miss" if embedding is None else "hit")
+        return embedding
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        embeddings, missing = self._lookup(texts)
+        if missing:
+            with EMBEDDING_SECONDS.time(bot=current_bot.get(), kind="text"):
+                fresh = self._embed_model._get_text_embeddings(
+                    [texts[i] for i in missing])
+            self._store(texts, embeddings, missing, fresh)
+        return embeddings
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        embeddings, missing = self._lookup(texts)
+        if missing:
+            with EMBEDDING_SECONDS.time(bot=current_bot.get(), kind="text"):
+                fresh = await self._embed_model._aget_text_embeddings(
+                    [texts[i] for i in missing])
+            self._store(texts, embeddings, missing, fresh)
+        return embeddings
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Optional[Embedding]], List[int]]:
+        """Cached embeddings of texts and the positions of the misses."""
+        bot = current_bot.get()
+        EMBEDDING_BATCH_SIZE.observe(len(texts), bot=bot, kind="text")
+        embeddings = self._cache.get_many(self.model_name, texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        CACHE_LOOKUPS.inc(len(texts) - len(missing),
+                          cache="embedding", bot=bot, result="hit")
+        CACHE_LOOKUPS.inc(len(missing), cache="embedding", bot=bot, result="miss")
+        return embeddings, missing
+
+    def _store(self, texts: List[str], embeddings: List[Optional[Embedding]],
+               missing: List[int], fresh: List[Embedding]) -> None:
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+        self._cache.put_many(
+            self.model_name, [texts[i] for i in missing], fresh)
+
+
+def install_embedding_cache(cache: EmbeddingCache,
+                            query_cache_size: int = 2048) -> CachedEmbedding:
+    """Put the cache in front of the embedding model configured on Settings.
+
+    A cache installed earlier is replaced, not stacked, so each new app
+    instance gets the cache it opened.
+    """
+    embed_model = Settings.embed_model
+    if isinstance(embed_model, CachedEmbedding):
+        embed_model = embed_model._embed_model
+
+    cached = CachedEmbedding(embed_model, cache, query_cache_size)
+    Settings.embed_model = cached
+    logger.info(f"Embedding cache enabled for model {cached.model_name}")
+    return cached
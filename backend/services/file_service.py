@@ -1,9 +1,23 @@
 # backend/services/file_service.py
 import os
 import logging
+import tempfile
+from typing import Dict, List, Sequence
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.routing import BaseRoute, Match
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Multipart boundaries and part headers around a file's content
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size."""
+
 
 class FileService:
     @staticmethod
@@ -27,3 +41,114 @@ class FileService:
         except Exception as e:
             logger.error(f"File save failed: {str(e)}")
             return False
+
+    @staticmethod
+    def upload_filename(upload: UploadFile) -> str:
+        """Return the upload's bare filename, rejecting empty or hidden names."""
+        filename = os.path.basename(upload.filename or "")
+        if not filename or filename.startswith("."):
+            raise ValueError(f"Invalid filename: {upload.filename!r}")
+        return filename
+
+    @staticmethod
+    async def stream_to_temp(upload: UploadFile, directory: str, max_bytes: int,
+                             chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+        """Copy an upload in fixed-size chunks to a hidden temp file in directory.
+
+        The temp file lives next to its destination so commit_upload can move
+        it into place atomically. Raises UploadTooLarge past max_bytes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=".upload-", suffix=".part")
+        try:
+            size = 0
+            with os.fdopen(fd, "wb") as f:
+                while chunk := await upload.read(chunk_size):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(
+                            f"{upload.filename} exceeds {max_bytes} bytes")
+                    await run_in_threadpool(f.write, chunk)
+            return tmp_path
+        except BaseException:
+            FileService.safe_delete(tmp_path)
+            raise
+
+    @staticmethod
+    def commit_upload(tmp_path: str, directory: str, filename: str) -> str:
+        file_path = os.path.join(directory, filename)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    @staticmethod
+    async def save_uploads(uploads: List[UploadFile], directory: str,
+                           max_bytes: int) -> List[str]:
+        """Stream several uploads to disk; none is moved into place unless all fit."""
+        filenames = [FileService.upload_filename(upload) for upload in uploads]
+        tmp_paths = []
+        try:
+            for upload in uploads:
+                tmp_paths.append(
+                    await FileService.stream_to_temp(upload, directory, max_bytes))
+        except BaseException:
+            for tmp_path in tmp_paths:
+                FileService.safe_delete(tmp_path)
+            raise
+
+        for tmp_path, filename in zip(tmp_paths, filenames):
+            FileService.commit_upload(tmp_path, directory, filename)
+        return filenames
+
+
+class UploadLimitMiddleware:
+    """Rejects upload requests with 413 before their body is spooled to disk.
+
+    limits maps route paths (e.g. "/upload/{bot_id}") to the largest request
+    body they accept. A larger Content-Length is refused without reading
+    the body; bodies without one, or longer than announced, fail as soon
+    as the limit is crossed while they are being received.
+    """
+
+    def __init__(self, app, routes: Sequence[BaseRoute], limits: Dict[str, int]):
+        self.app = app
+        self.routes = routes
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self._limit(scope) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds {limit} bytes"
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            await JSONResponse({"detail": detail}, status_code=413)(
+                scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Re-raised by FastAPI's body parsing, unlike other errors
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _limit(self, scope):
+        for route in self.routes:
+            path = getattr(route, "path", None)
+            if path in self.limits and route.matches(scope)[0] == Match.FULL:
+                return self.limits[path]
+        return None
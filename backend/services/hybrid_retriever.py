@@ -0,0 +1,84 @@
+# backend/services/hybrid_retriever.py
+import asyncio
+import logging
+from typing import Dict, List
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from backend.services.keyword_index import KeywordIndex
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant; larger values flatten rank differences
+RRF_K = 60
+
+
+def fuse(result_lists: List[List[NodeWithScore]], top_k: int) -> List[NodeWithScore]:
+    """Merge ranked lists by reciprocal rank fusion, keeping the first copy
+    of each node."""
+    scores: Dict[str, float] = {}
+    nodes: Dict[str, NodeWithScore] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            node_id = result.node.node_id
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            nodes.setdefault(node_id, result)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [NodeWithScore(node=nodes[node_id].node, score=scores[node_id])
+            for node_id in ranked]
+
+
+class HybridRetriever(BaseRetriever):
+    """Combines a bot's vector retriever with its BM25 keyword index.
+
+    Queries naming an article ("artículo 79", "art. 14") are answered from
+    the keyword index alone when it has chunks citing it, skipping the query
+    embedding. Other queries fuse vector and keyword results; when vector
+    retrieval takes longer than vector_timeout the keyword results are used
+    on their own.
+    """
+
+    def __init__(self, bot_id: str, vector_retriever: BaseRetriever,
+                 keyword_index: KeywordIndex, similarity_top_k: int = 3,
+                 vector_timeout: float = 3.0):
+        super().__init__(callback_manager=vector_retriever.callback_manager)
+        self.bot_id = bot_id
+        self.vector_retriever = vector_retriever
+        self.keyword_index = keyword_index
+        self.similarity_top_k = similarity_top_k
+        self.vector_timeout = vector_timeout
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        query = query_bundle.query_str
+        articles = self.keyword_index.article_search(
+            self.bot_id, query, self.similarity_top_k)
+        if articles:
+            return articles
+        return fuse([
+            self.vector_retriever.retrieve(query_bundle),
+            self.keyword_index.search(self.bot_id, query, self.similarity_top_k),
+        ], self.similarity_top_k)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        query = query_bundle.query_str
+        articles = await asyncio.to_thread(
+            self.keyword_index.article_search,
+            self.bot_id, query, self.similarity_top_k)
+        if articles:
+            return articles
+
+        keyword = asyncio.create_task(asyncio.to_thread(
+            self.keyword_index.search, self.bot_id, query, self.similarity_top_k))
+        try:
+            # On a thread: the vector store runs its query synchronously even
+            # from aretrieve, where it could neither time out nor let others run
+            vector = await asyncio.wait_for(
+                asyncio.to_thread(self.vector_retriever.retrieve, query_bundle),
+                self.vector_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Vector retrieval for bot {self.bot_id} took over "
+                f"{self.vector_timeout}s; answering from keyword results")
+            return await keyword
+        return fuse([vector, await keyword], self.similarity_top_k)
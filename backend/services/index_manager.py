@@ -1,33 +1,360 @@
 # backend/services/index_manager.py
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext
+from llama_index.core import Document, Settings, VectorStoreIndex, SimpleDirectoryReader
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.utils import iter_batch
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import logging
-import os  # Add this import
-from typing import Optional
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from filelock import FileLock
+from backend.core.config import settings
+from backend.services.index_versions import SharedIndexVersions
+from backend.services.ingestion_manifest import IngestionManifest
+from backend.services.keyword_index import KeywordIndex, fts5_available
+from backend.services.metrics import (
+    CACHE_LOOKUPS,
+    INGESTION_CHUNKS,
+    INGESTION_STAGE_SECONDS,
+    current_bot,
+)
+from backend.services.parse_cache import ParsedTextCache
 
 logger = logging.getLogger(__name__)
 
+# Nodes embedded and written per step, so progress can be reported
+INSERT_BATCH_SIZE = 100
+
+
+def parse_file(path: str) -> List[Document]:
+    """Parse one file; module-level so it can run in a worker process."""
+    return SimpleDirectoryReader(
+        input_files=[path], filename_as_id=True).load_data()
+
+
+def timed_parse_file(path: str) -> Tuple[List[Document], float]:
+    """parse_file that also returns the seconds spent parsing."""
+    started = time.perf_counter()
+    documents = parse_file(path)
+    return documents, time.perf_counter() - started
+
 
 class IndexManager:
-    def __init__(self, chroma_manager):
+    """Keeps each bot's Chroma collection in sync with its data directory.
+
+    Only new or modified files are embedded, and only files whose content
+    has never been parsed before are parsed; vectors of files that changed
+    or disappeared are removed by document ID using the bot's ingestion
+    manifest. The keyword index is updated alongside the vectors.
+
+    Several worker processes may share the same state: writes to a bot's
+    collection hold a file lock, so one process writes at a time, and bump
+    the bot's shared index version so the others know to reattach.
+    """
+
+    def __init__(self, chroma_manager, state_dir: str = settings.STATE_DIR,
+                 parse_workers: int = settings.PARSE_WORKERS,
+                 parse_cache_dir: str = settings.PARSE_CACHE_DIR,
+                 keyword_index_path: str = settings.KEYWORD_INDEX_PATH,
+                 versions_path: str = settings.INDEX_VERSIONS_PATH):
         self.chroma_manager = chroma_manager
+        self.state_dir = state_dir
+        self.versions = SharedIndexVersions(versions_path)
+        os.makedirs(os.path.join(state_dir, "locks"), exist_ok=True)
+        # Shared version each bot's collection was at when last synced here
+        self.synced_versions: Dict[str, int] = {}
+        self.keyword_index: Optional[KeywordIndex] = None
+        if fts5_available():
+            self.keyword_index = KeywordIndex(keyword_index_path)
+        else:
+            logger.warning("SQLite lacks FTS5; keyword retrieval is disabled")
+        self.parse_cache = ParsedTextCache(
+            parse_cache_dir, max_bytes=settings.PARSE_CACHE_MAX_BYTES)
+        # Documents are parsed in a process pool shared by all bots
+        self.parse_workers = parse_workers
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Serializes manifest and collection updates of the same bot
+        self._bot_locks = defaultdict(threading.Lock)
 
-    def build_index(self, bot) -> Optional[VectorStoreIndex]:
-        try:
-            if not os.path.exists(bot.data_dir) or not os.listdir(bot.data_dir):
-                return None
+    def manifest_path(self, bot) -> str:
+        return os.path.join(self.state_dir, f"{bot.collection_name}.json")
+
+    def _write_lock(self, bot) -> FileLock:
+        """Cross-process lock held while a bot's collection is written."""
+        return FileLock(os.path.join(self.state_dir, "locks", f"{bot.id}.lock"))
+
+    def _synced(self, bot) -> None:
+        """Record the shared version; call with the bot's write lock held."""
+        self.synced_versions[bot.id] = self.versions.get(bot.id)
+
+    def open_index(self, bot) -> Optional[VectorStoreIndex]:
+        """Attach to the bot's collection as it is, without syncing it.
 
-            documents = SimpleDirectoryReader(bot.data_dir).load_data()
+        Takes no lock: used to pick up a collection another worker wrote,
+        whose manifest is already current. None when the collection is empty.
+        """
+        collection = self.chroma_manager.get_collection(bot.collection_name)
+        if collection.count() == 0:
+            return None
+        return VectorStoreIndex.from_vector_store(
+            ChromaVectorStore(chroma_collection=collection))
+
+    def rebind(self, bot, index: VectorStoreIndex) -> None:
+        """Point an open index at its collection on the current Chroma client."""
+        index.vector_store._collection = self.chroma_manager.get_collection(
+            bot.collection_name)
+
+    def build_index(self, bot, on_progress: Optional[Callable[[int], None]] = None
+                    ) -> Optional[VectorStoreIndex]:
+        """Sync the bot's collection with its data directory and return the index.
+
+        on_progress is called with the number of chunks embedded after each
+        write to the vector store.
+        """
+        with self._bot_locks[bot.id], self._write_lock(bot), \
+                self.chroma_manager.pinned():
+            index = self._sync(bot, on_progress)
+            self._synced(bot)
+            return index
+
+    def _sync(self, bot, on_progress: Optional[Callable[[int], None]]
+              ) -> Optional[VectorStoreIndex]:
+        current_bot.set(bot.id)
+        try:
+            manifest = IngestionManifest.load(self.manifest_path(bot))
             collection = self.chroma_manager.get_collection(
                 bot.collection_name)
-            vector_store = ChromaVectorStore(chroma_collection=collection)
 
-            return VectorStoreIndex.from_documents(
-                documents,
-                storage_context=StorageContext.from_defaults(
-                    vector_store=vector_store),
-                show_progress=False
-            )
+            # Collections written before the manifest existed hold an unknown
+            # number of duplicated vectors; start them over once.
+            if manifest.is_empty() and collection.count() > 0:
+                logger.info(
+                    f"Resetting unmanaged collection {bot.collection_name}")
+                collection = self.chroma_manager.reset_collection(
+                    bot.collection_name)
+                if self.keyword_index is not None:
+                    self.keyword_index.clear(bot.id)
+            elif self.keyword_index is not None and collection.count() > 0 \
+                    and self.keyword_index.count(bot.id) == 0:
+                self._backfill_keywords(bot, collection)
+
+            index = VectorStoreIndex.from_vector_store(
+                ChromaVectorStore(chroma_collection=collection))
+
+            files = manifest.current_files(bot.data_dir)
+            to_ingest, stale = manifest.diff(files)
+
+            try:
+                for name in stale:
+                    self._remove_file_vectors(bot, index, manifest.forget(name))
+
+                if to_ingest:
+                    self._ingest_files(
+                        index, manifest, bot, to_ingest, files, on_progress)
+            finally:
+                # Also after a failure: some vectors may have been written
+                if stale or to_ingest:
+                    self.versions.bump(bot.id)
+
+            if stale or to_ingest:
+                manifest.save()
+                logger.info(
+                    f"Bot {bot.id}: ingested {len(to_ingest)} file(s), "
+                    f"removed {len(stale)} stale file(s)")
+            elif files:
+                logger.info(
+                    f"Bot {bot.id}: index up to date, reusing persisted vectors")
+
+            if not files:
+                return None
+            return index
         except Exception as e:
             logger.error(f"Index build failed: {str(e)}")
             return None
+
+    def delete_document(self, bot, filename: str) -> bool:
+        """Delete a document from disk and drop only its vectors.
+
+        The file's vectors are removed by the document IDs stored in the
+        manifest, falling back to a file_name metadata filter for files the
+        manifest does not know about. Other documents are left untouched.
+        """
+        file_path = os.path.join(bot.data_dir, filename)
+
+        if not os.path.exists(file_path):
+            return False
+
+        try:
+            with self._bot_locks[bot.id], self._write_lock(bot), \
+                    self.chroma_manager.pinned():
+                try:
+                    self._delete_file_vectors(bot, filename)
+                finally:
+                    self.versions.bump(bot.id)
+                    self._synced(bot)
+            logger.info(f"Bot {bot.id}: removed vectors of {filename}")
+            return True
+        except Exception as e:
+            logger.error(
+                f"Error deleting document {filename} for bot {bot.id}: {e}")
+            return False
+
+    def purge(self, bot) -> None:
+        """Drop a bot's collection, manifest and keyword entries."""
+        with self._bot_locks[bot.id], self._write_lock(bot):
+            self.chroma_manager.delete_collection(bot.collection_name)
+            manifest_path = self.manifest_path(bot)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            if self.keyword_index is not None:
+                self.keyword_index.clear(bot.id)
+            self.versions.bump(bot.id)
+
+    def _delete_file_vectors(self, bot, filename: str) -> None:
+        os.remove(os.path.join(bot.data_dir, filename))
+
+        manifest = IngestionManifest.load(self.manifest_path(bot))
+        entry = manifest.forget(filename)
+        collection = self.chroma_manager.get_collection(bot.collection_name)
+        vector_store = ChromaVectorStore(chroma_collection=collection)
+
+        if entry.get("doc_ids"):
+            for doc_id in entry["doc_ids"]:
+                vector_store.delete(doc_id)
+            if self.keyword_index is not None:
+                self.keyword_index.delete_documents(bot.id, entry["doc_ids"])
+        else:
+            collection.delete(where={"file_name": filename})
+            if self.keyword_index is not None:
+                self.keyword_index.delete_file(bot.id, filename)
+
+        manifest.save()
+
+    def _ingest_files(self, index: VectorStoreIndex, manifest: IngestionManifest,
+                      bot, names: list, files: dict,
+                      on_progress: Optional[Callable[[int], None]]) -> None:
+        """Parse files in parallel and embed each one as soon as it is parsed."""
+        for name, documents in self._parse_files(bot, names, files):
+            # Document IDs are derived from the file path, so this also clears
+            # vectors left behind by an ingestion that failed halfway.
+            for doc in documents:
+                index.delete_ref_doc(doc.doc_id, delete_from_docstore=True)
+            if self.keyword_index is not None:
+                self.keyword_index.delete_documents(
+                    bot.id, [doc.doc_id for doc in documents])
+
+            with INGESTION_STAGE_SECONDS.time(bot=bot.id, stage="chunk"):
+                nodes = run_transformations(documents, Settings.transformations)
+            for batch in iter_batch(nodes, INSERT_BATCH_SIZE):
+                # Embedded up front so embedding and vector writes are timed
+                # apart; insert_nodes keeps embeddings that are already set
+                with INGESTION_STAGE_SECONDS.time(bot=bot.id, stage="embed"):
+                    batch = Settings.embed_model(batch)
+                with INGESTION_STAGE_SECONDS.time(bot=bot.id, stage="write"):
+                    index.insert_nodes(batch)
+                if self.keyword_index is not None:
+                    with INGESTION_STAGE_SECONDS.time(bot=bot.id, stage="keywords"):
+                        self.keyword_index.add(bot.id, batch)
+                INGESTION_CHUNKS.inc(len(batch), bot=bot.id)
+                if on_progress:
+                    on_progress(len(batch))
+
+            manifest.record(
+                name, files[name],
+                [doc.doc_id for doc in documents],
+                [node.node_id for node in nodes]
+            )
+
+    def _parse_files(self, bot, names: list, files: dict
+                     ) -> Iterator[Tuple[str, List[Document]]]:
+        """Yield (filename, documents) pairs in the order parsing finishes.
+
+        Files found in the parsed-text cache are yielded first; the rest are
+        parsed, in the process pool when there is more than one, and cached.
+        """
+        to_parse = {}
+        for name in names:
+            path = os.path.join(bot.data_dir, name)
+            documents = self.parse_cache.get(files[name].hash, path)
+            CACHE_LOOKUPS.inc(cache="parse", bot=bot.id,
+                              result="miss" if documents is None else "hit")
+            if documents is None:
+                to_parse[path] = name
+            else:
+                yield name, documents
+
+        if self.parse_workers <= 1 or len(to_parse) <= 1:
+            for path, name in to_parse.items():
+                yield name, self._cache_parsed(
+                    bot, path, files[name].hash, timed_parse_file(path))
+            return
+
+        futures = {
+            self._get_parse_pool().submit(timed_parse_file, path): path
+            for path in to_parse
+        }
+        try:
+            for future in as_completed(futures):
+                path = futures[future]
+                name = to_parse[path]
+                yield name, self._cache_parsed(
+                    bot, path, files[name].hash, future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _cache_parsed(self, bot, path: str, digest: str,
+                      parsed: Tuple[List[Document], float]) -> List[Document]:
+        documents, seconds = parsed
+        INGESTION_STAGE_SECONDS.observe(seconds, bot=bot.id, stage="parse")
+        if documents:
+            self.parse_cache.put(digest, path, documents)
+        return documents
+
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._parse_pool is None:
+                # spawn: forking a process that already runs Chroma and
+                # executor threads can deadlock the children
+                self._parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._parse_pool
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown(wait=False, cancel_futures=True)
+                self._parse_pool = None
+        if self.keyword_index is not None:
+            self.keyword_index.close()
+        self.versions.close()
+
+    def _remove_file_vectors(self, bot, index: VectorStoreIndex,
+                             entry: dict) -> None:
+        for doc_id in entry.get("doc_ids", []):
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        if self.keyword_index is not None:
+            self.keyword_index.delete_documents(bot.id, entry.get("doc_ids", []))
+
+    def _backfill_keywords(self, bot, collection, page_size: int = 1000) -> None:
+        """Index the chunks of a collection ingested before keyword search."""
+        logger.info(f"Bot {bot.id}: building keyword index from {bot.collection_name}")
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"],
+                                  limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.keyword_index.add(bot.id, [
+                metadata_dict_to_node(metadata, text=text)
+                for text, metadata in zip(page["documents"], page["metadatas"])
+            ])
+            offset += len(page["ids"])
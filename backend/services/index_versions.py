@@ -0,0 +1,47 @@
+# backend/services/index_versions.py
+import os
+import sqlite3
+import threading
+
+
+class SharedIndexVersions:
+    """Per-bot index version shared by every worker process.
+
+    The process that changes a bot's collection bumps its version; the others
+    compare it with the version they opened and reattach when it moved on.
+    Reads are a single indexed SQLite lookup, cheap enough to do per request.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions ("
+            "bot_id TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, bot_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM versions WHERE bot_id = ?", (bot_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, bot_id: str) -> int:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versions (bot_id, version) VALUES (?, 1) "
+                "ON CONFLICT (bot_id) DO UPDATE SET version = version + 1",
+                (bot_id,))
+            self._conn.commit()
+            return self._conn.execute(
+                "SELECT version FROM versions WHERE bot_id = ?", (bot_id,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
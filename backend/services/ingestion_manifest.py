@@ -0,0 +1,122 @@
+# backend/services/ingestion_manifest.py
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """Return the sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileState(NamedTuple):
+    """A file's content hash and the stat it was taken under."""
+    hash: str
+    size: int
+    mtime_ns: int
+
+
+def list_data_files(data_dir: str) -> List[str]:
+    """List the ingestible files of a bot's data directory."""
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(data_dir)
+        if not name.startswith(".")
+        and os.path.isfile(os.path.join(data_dir, name))
+    )
+
+
+class IngestionManifest:
+    """Records the content hash and vector IDs of every file ingested for a bot.
+
+    Each entry maps a filename to its sha256, the document IDs produced by the
+    reader and the node IDs written to Chroma, so uploads only touch the files
+    that actually changed.
+    """
+
+    def __init__(self, path: str, files: Dict[str, dict] = None):
+        self.path = path
+        self.files: Dict[str, dict] = files or {}
+
+    @classmethod
+    def load(cls, path: str) -> "IngestionManifest":
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                logger.warning(f"Ignoring manifest {path} with old format")
+                return cls(path)
+            return cls(path, data.get("files", {}))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read manifest {path}: {e}")
+            return cls(path)
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def is_empty(self) -> bool:
+        return not self.files
+
+    def current_files(self, data_dir: str) -> Dict[str, FileState]:
+        """Hash the files of data_dir, reusing stored hashes for untouched files.
+
+        Each file is stat'ed before it is hashed, and that stat is what
+        record() stores: a file replaced while it is being ingested then no
+        longer matches its entry and is hashed again on the next sync.
+        """
+        files = {}
+        for name in list_data_files(data_dir):
+            path = os.path.join(data_dir, name)
+            stat = os.stat(path)
+            entry = self.files.get(name)
+            if entry and entry.get("size") == stat.st_size \
+                    and entry.get("mtime_ns") == stat.st_mtime_ns:
+                digest = entry["hash"]
+            else:
+                digest = file_hash(path)
+            files[name] = FileState(digest, stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def diff(self, files: Dict[str, FileState]) -> Tuple[List[str], List[str]]:
+        """Return (files to ingest, files whose vectors are stale)."""
+        to_ingest = [
+            name for name, state in files.items()
+            if self.files.get(name, {}).get("hash") != state.hash
+        ]
+        stale = [
+            name for name, entry in self.files.items()
+            if name not in files or files[name].hash != entry.get("hash")
+        ]
+        return to_ingest, stale
+
+    def record(self, name: str, state: FileState,
+               doc_ids: List[str], node_ids: List[str]) -> None:
+        self.files[name] = {
+            "hash": state.hash,
+            "size": state.size,
+            "mtime_ns": state.mtime_ns,
+            "doc_ids": doc_ids,
+            "node_ids": node_ids,
+        }
+
+    def forget(self, name: str) -> dict:
+        return self.files.pop(name, {})
@@ -0,0 +1,213 @@
+# backend/services/job_queue.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from backend.services.metrics import INGESTION_JOB_SECONDS, INGESTION_JOBS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Seconds between saves of a running job's progress to the store
+PROGRESS_SAVE_INTERVAL = 2.0
+
+
+class JobQueueFull(Exception):
+    """Raised when too many ingestion jobs are already waiting."""
+
+
+@dataclass
+class IngestionJob:
+    bot_id: str
+    filenames: List[str]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: str = QUEUED
+    chunks_embedded: int = 0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in (SUCCEEDED, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def add_chunks(self, count: int) -> None:
+        self.chunks_embedded += count
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "bot_id": self.bot_id,
+            "filenames": self.filenames,
+            "state": self.state,
+            "chunks_embedded": self.chunks_embedded,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "queued_seconds": round(
+                (self.started_at or time.time()) - self.created_at, 3),
+            "error": self.error,
+        }
+
+
+class IngestionJobQueue:
+    """Runs ingestion jobs on a bounded worker pool.
+
+    Jobs of the same bot run one after another in submission order, while
+    jobs of different bots run in parallel. A bot's next job is only handed
+    to the pool once the previous one finished, so no worker ever sits
+    blocked waiting on another bot's work.
+
+    With store_path, job states are also written to SQLite so a job can be
+    polled through any worker process, not only the one running it. Progress
+    reported through report_progress is saved every PROGRESS_SAVE_INTERVAL
+    seconds while the job runs.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 100,
+                 max_finished: int = 500, store_path: Optional[str] = None):
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ingestion")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._waiting: Dict[str, Deque] = {}
+        self._progress_saved: Dict[str, float] = {}
+        self._store: Optional[sqlite3.Connection] = None
+        if store_path:
+            os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+            self._store = sqlite3.connect(
+                store_path, check_same_thread=False, timeout=30)
+            self._store.execute("PRAGMA journal_mode=WAL")
+            self._store.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._store.commit()
+
+    def submit(self, bot_id: str, filenames: List[str],
+               fn: Callable[[IngestionJob], None]) -> IngestionJob:
+        """Queue fn(job) to run after every earlier job of the same bot."""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} ingestion jobs already pending")
+
+            job = IngestionJob(bot_id=bot_id, filenames=filenames)
+            self._jobs[job.id] = job
+            self._prune()
+            self._save(job)
+
+            if bot_id in self._waiting:
+                self._waiting[bot_id].append((job, fn))
+                return job
+            self._waiting[bot_id] = deque()
+
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def report_progress(self, job: IngestionJob, chunks: int) -> None:
+        """Count embedded chunks, saving them for other workers now and then."""
+        job.add_chunks(chunks)
+        now = time.monotonic()
+        if now - self._progress_saved.get(job.id, 0.0) < PROGRESS_SAVE_INTERVAL:
+            return
+        self._progress_saved[job.id] = now
+        with self._lock:
+            self._save(job)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """A job of this process, else its last saved state from the store."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None or self._store is None:
+                return job
+            row = self._store.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return IngestionJob(**json.loads(row[0])) if row else None
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Drop jobs that have not started; with wait, let running ones finish."""
+        with self._lock:
+            for waiting in self._waiting.values():
+                for job, _ in waiting:
+                    job.state = FAILED
+                    job.error = "Cancelled by shutdown"
+                    self._save(job)
+                waiting.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._store is not None:
+            with self._lock:
+                self._store.close()
+                self._store = None
+
+    def _run(self, job: IngestionJob, fn: Callable[[IngestionJob], None]) -> None:
+        job.state = RUNNING
+        job.started_at = time.time()
+        with self._lock:
+            self._save(job)
+        INGESTION_JOBS_RUNNING.inc(bot=job.bot_id)
+        try:
+            fn(job)
+            job.state = SUCCEEDED
+        except Exception as e:
+            logger.error(f"Ingestion job {job.id} for bot {job.bot_id} failed: {e}")
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._progress_saved.pop(job.id, None)
+            with self._lock:
+                self._save(job)
+            INGESTION_JOBS_RUNNING.dec(bot=job.bot_id)
+            INGESTION_JOB_SECONDS.observe(
+                job.elapsed, bot=job.bot_id, state=job.state)
+            logger.info(
+                f"Ingestion job {job.id} for bot {job.bot_id} {job.state} "
+                f"in {job.elapsed:.2f}s ({job.chunks_embedded} chunks)")
+            self._start_next(job.bot_id)
+
+    def _start_next(self, bot_id: str) -> None:
+        with self._lock:
+            waiting = self._waiting[bot_id]
+            if not waiting:
+                del self._waiting[bot_id]
+                return
+            job, fn = waiting.popleft()
+        self._executor.submit(self._run, job, fn)
+
+    def _save(self, job: IngestionJob) -> None:
+        """Write a job's state to the store; call with _lock held."""
+        if self._store is None:
+            return
+        self._store.execute(
+            "INSERT OR REPLACE INTO jobs (id, data, updated_at) VALUES (?, ?, ?)",
+            (job.id, json.dumps(asdict(job)), time.time()))
+        self._store.commit()
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+        if self._store is not None:
+            # Keep saved jobs for a day, long enough for any client to poll
+            self._store.execute(
+                "DELETE FROM jobs WHERE updated_at < ?", (time.time() - 86400,))
@@ -0,0 +1,161 @@
+# backend/services/keyword_index.py
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Sequence
+
+from llama_index.core.schema import BaseNode, NodeWithScore, TextNode
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# "artículo 79", "articulos 14", "art. 75", "arts 18"
+_ARTICLE_RE = re.compile(r"\bart(?:[íi]culos?|s?\.?)\s*(\d+)", re.IGNORECASE)
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def cited_articles(text: str) -> List[str]:
+    """Article numbers a text names, sorted and without repeats."""
+    return sorted({str(int(number)) for number in _ARTICLE_RE.findall(text)})
+
+
+def fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute(
+            "CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+class KeywordIndex:
+    """BM25 index of every bot's chunks, backed by SQLite FTS5.
+
+    Chunks are added and removed together with their vectors during
+    ingestion, keyed by node ID and grouped by the document they came from.
+    Accents are folded when indexing and querying, so "artículo" matches
+    "articulo".
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "id INTEGER PRIMARY KEY, bot_id TEXT NOT NULL, "
+            "node_id TEXT NOT NULL, ref_doc_id TEXT, file_name TEXT, "
+            "metadata TEXT NOT NULL, text TEXT NOT NULL, "
+            "UNIQUE (bot_id, node_id));"
+            "CREATE INDEX IF NOT EXISTS chunks_ref_doc "
+            "ON chunks (bot_id, ref_doc_id);"
+            "CREATE INDEX IF NOT EXISTS chunks_file ON chunks (bot_id, file_name);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5("
+            "text, content='chunks', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2');"
+            "CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN "
+            "INSERT INTO chunks_fts (rowid, text) VALUES (new.id, new.text); END;"
+            "CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN "
+            "INSERT INTO chunks_fts (chunks_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); END;"
+        )
+        self._conn.commit()
+
+    def add(self, bot_id: str, nodes: Sequence[BaseNode]) -> None:
+        rows = [
+            (bot_id, node.node_id, node.ref_doc_id,
+             node.metadata.get("file_name"),
+             json.dumps(node.metadata, ensure_ascii=False, default=str),
+             node.get_content())
+            for node in nodes
+        ]
+        with self._lock:
+            self._delete_where(
+                "node_id", bot_id, [node.node_id for node in nodes])
+            self._conn.executemany(
+                "INSERT INTO chunks "
+                "(bot_id, node_id, ref_doc_id, file_name, metadata, text) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def delete_documents(self, bot_id: str, ref_doc_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._delete_where("ref_doc_id", bot_id, list(ref_doc_ids))
+            self._conn.commit()
+
+    def delete_file(self, bot_id: str, file_name: str) -> None:
+        with self._lock:
+            self._delete_where("file_name", bot_id, [file_name])
+            self._conn.commit()
+
+    def clear(self, bot_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE bot_id = ?", (bot_id,))
+            self._conn.commit()
+
+    def count(self, bot_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE bot_id = ?", (bot_id,)
+            ).fetchone()[0]
+
+    def search(self, bot_id: str, query: str, top_k: int) -> List[NodeWithScore]:
+        """Chunks of the bot ranked by BM25 against any of the query's words."""
+        terms = {token for token in _TOKEN_RE.findall(query.lower())}
+        if not terms:
+            return []
+        return self._match(
+            bot_id, " OR ".join(f'"{term}"' for term in sorted(terms)), top_k)
+
+    def article_search(self, bot_id: str, query: str,
+                       top_k: int) -> List[NodeWithScore]:
+        """Chunks citing the article numbers the query names, if it names any.
+
+        Matches "artículo N" and "art. N" as phrases, so a lookup of one
+        article does not return every chunk that merely mentions its number.
+        """
+        numbers = cited_articles(query)
+        if not numbers:
+            return []
+        phrases = []
+        for number in numbers:
+            phrases += [f'"articulo {number}"', f'"art {number}"']
+        return self._match(bot_id, " OR ".join(phrases), top_k)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _match(self, bot_id: str, expression: str,
+               top_k: int) -> List[NodeWithScore]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.node_id, c.text, c.metadata, bm25(chunks_fts) AS rank "
+                "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? AND c.bot_id = ? "
+                "ORDER BY rank LIMIT ?", (expression, bot_id, top_k)
+            ).fetchall()
+        # bm25() is lower for better matches
+        return [
+            NodeWithScore(
+                node=TextNode(id_=node_id, text=text, metadata=json.loads(metadata)),
+                score=-rank
+            )
+            for node_id, text, metadata, rank in rows
+        ]
+
+    def _delete_where(self, column: str, bot_id: str, values: List[str]) -> None:
+        for start in range(0, len(values), _SQL_BATCH):
+            batch = values[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(
+                f"DELETE FROM chunks WHERE bot_id = ? AND {column} IN ({placeholders})",
+                [bot_id, *batch]
+            )
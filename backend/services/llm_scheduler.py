@@ -0,0 +1,192 @@
+# backend/services/llm_scheduler.py
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from backend.services.metrics import (
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_REJECTIONS,
+    LLM_QUEUE_WAIT_SECONDS,
+    LLM_SLOTS_IN_USE,
+)
+
+
+class SchedulerBusy(Exception):
+    """Raised when an LLM call cannot be admitted; retry after retry_after."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM scheduler busy ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LLMSlot:
+    """A granted LLM slot; release() gives it back and may be called twice."""
+
+    __slots__ = ("_scheduler", "bot_id", "started", "released")
+
+    def __init__(self, scheduler: "LLMScheduler", bot_id: str):
+        self._scheduler = scheduler
+        self.bot_id = bot_id
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._scheduler._release(self.bot_id, self.started)
+
+
+class _Waiter:
+    __slots__ = ("bot_id", "tag", "future", "enqueued_at", "granted")
+
+    def __init__(self, bot_id: str, tag: float):
+        self.bot_id = bot_id
+        self.tag = tag
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class LLMScheduler:
+    """Admits chat requests to the LLM within global and per-bot limits.
+
+    At most max_concurrency calls run at once, and at most
+    per_bot_concurrency of them for the same bot. Calls over either limit
+    wait in a queue of at most max_queue entries, and are served in
+    weighted-fair order across bots. Each waiter is tagged with a virtual
+    start time that advances by 1 / weight per call of its bot, so a bot
+    with a deep backlog cannot push back the others and a bot of weight 2
+    gets twice the share of a bot of weight 1 while both are waiting.
+    A full queue, or a wait longer than queue_timeout seconds, raises
+    SchedulerBusy with an estimate of when to retry.
+
+    Not thread safe: use it from the event loop only.
+    """
+
+    def __init__(self, max_concurrency: int = 8, per_bot_concurrency: int = 4,
+                 max_queue: int = 64, queue_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.per_bot_concurrency = per_bot_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active: Dict[str, int] = defaultdict(int)
+        self._total_active = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        self._waiting = 0
+        self._last_tag: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        # Moving average of how long a call holds its slot, in seconds
+        self._service_time = 1.0
+
+    @asynccontextmanager
+    async def slot(self, bot_id: str, weight: float = 1.0):
+        """Hold an LLM slot for the duration of the block."""
+        slot = await self.acquire(bot_id, weight)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    async def acquire(self, bot_id: str, weight: float = 1.0) -> LLMSlot:
+        """Wait for a slot; the caller must release() it when done."""
+        if (self._total_active < self.max_concurrency
+                and self._active.get(bot_id, 0) < self.per_bot_concurrency):
+            # Slots are handed to eligible waiters as soon as they free up,
+            # so a free one here means no waiter could have used it
+            self._start(bot_id)
+            LLM_QUEUE_WAIT_SECONDS.observe(0.0, bot=bot_id)
+            return LLMSlot(self, bot_id)
+
+        if self._waiting >= self.max_queue:
+            LLM_QUEUE_REJECTIONS.inc(bot=bot_id, reason="queue_full")
+            raise SchedulerBusy("queue_full", self.retry_after())
+
+        tag = max(self._virtual_time, self._last_tag.get(bot_id, 0.0)) + 1.0 / weight
+        self._last_tag[bot_id] = tag
+        waiter = _Waiter(bot_id, tag)
+        self._queues.setdefault(bot_id, deque()).append(waiter)
+        self._waiting += 1
+        LLM_QUEUE_DEPTH.inc(bot=bot_id)
+
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.granted:
+                self._discard(waiter)
+                LLM_QUEUE_REJECTIONS.inc(bot=bot_id, reason="timeout")
+                raise SchedulerBusy("timeout", self.retry_after())
+        except asyncio.CancelledError:
+            # The client went away while waiting
+            if waiter.granted:
+                LLMSlot(self, bot_id).release()
+            else:
+                self._discard(waiter)
+            raise
+        return LLMSlot(self, bot_id)
+
+    def _release(self, bot_id: str, started: float) -> None:
+        held = time.monotonic() - started
+        self._service_time = 0.8 * self._service_time + 0.2 * held
+        self._active[bot_id] -= 1
+        if not self._active[bot_id]:
+            del self._active[bot_id]
+        self._total_active -= 1
+        LLM_SLOTS_IN_USE.dec(bot=bot_id)
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        """Seconds until the calls already queued are likely to have run."""
+        return max(1, math.ceil(
+            (self._waiting + 1) * self._service_time / self.max_concurrency))
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "per_bot_concurrency": self.per_bot_concurrency,
+            "max_queue": self.max_queue,
+            "active": dict(self._active),
+            "waiting": {bot_id: len(queue)
+                        for bot_id, queue in self._queues.items()},
+            "avg_call_seconds": round(self._service_time, 3),
+        }
+
+    def _start(self, bot_id: str) -> None:
+        self._active[bot_id] += 1
+        self._total_active += 1
+        LLM_SLOTS_IN_USE.inc(bot=bot_id)
+
+    def _dispatch(self) -> None:
+        while self._total_active < self.max_concurrency:
+            best = None
+            for bot_id, queue in self._queues.items():
+                if (self._active.get(bot_id, 0) < self.per_bot_concurrency
+                        and (best is None or queue[0].tag < best.tag)):
+                    best = queue[0]
+            if best is None:
+                return
+            self._pop(best)
+            if best.future.done():
+                # Timed out or cancelled, its task has not run yet
+                continue
+            self._virtual_time = best.tag
+            self._start(best.bot_id)
+            best.granted = True
+            best.future.set_result(None)
+            LLM_QUEUE_WAIT_SECONDS.observe(
+                time.monotonic() - best.enqueued_at, bot=best.bot_id)
+
+    def _pop(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.bot_id]
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[waiter.bot_id]
+        self._waiting -= 1
+        LLM_QUEUE_DEPTH.dec(bot=waiter.bot_id)
+
+    def _discard(self, waiter: _Waiter) -> None:
+        if waiter in self._queues.get(waiter.bot_id, ()):
+            self._pop(waiter)
@@ -0,0 +1,251 @@
+# backend/services/memory_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.llms import LLM, ChatMessage, MessageRole
+from llama_index.core.memory import ChatMemoryBuffer
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str]
+
+SUMMARY_PROMPT = (
+    "Update the summary of a conversation between a user and an assistant "
+    "with the new messages below. Keep the facts, questions and answers "
+    "needed to continue the conversation, write in the conversation's "
+    "language and use at most {max_words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{messages}\n\n"
+    "Updated summary:"
+)
+
+
+def _is_summary(message: ChatMessage) -> bool:
+    return bool(message.additional_kwargs.get("summary"))
+
+
+class SummarizingMemory(ChatMemoryBuffer):
+    """Chat memory that folds older turns into a running summary.
+
+    The summary is stored as the first message of the conversation, so it
+    is spilled and restored with the rest. get() returns it followed by the
+    last recent_messages messages, trimmed to token_limit from the oldest,
+    so the history sent to the LLM stays bounded however long the
+    conversation gets. acompact() summarizes the messages older than those;
+    it is meant to run after the reply has been sent.
+    """
+
+    recent_messages: int = Field(default=6)
+    summary_max_words: int = Field(default=200)
+    _compacting: bool = PrivateAttr(default=False)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SummarizingMemory"
+
+    def _split(self, messages: List[ChatMessage]
+               ) -> Tuple[Optional[ChatMessage], List[ChatMessage], List[ChatMessage]]:
+        """(summary, messages to fold into it, messages kept verbatim)."""
+        summary = messages[0] if messages and _is_summary(messages[0]) else None
+        turns = messages[1:] if summary else messages
+        start = max(0, len(turns) - self.recent_messages)
+        # Never separate an answer from its question
+        while start > 0 and turns[start].role != MessageRole.USER:
+            start -= 1
+        return summary, turns[:start], turns[start:]
+
+    def get(self, input: Optional[str] = None, **kwargs: Any) -> List[ChatMessage]:
+        summary, _, recent = self._split(self.get_all())
+        head = [summary] if summary else []
+        budget = self.token_limit - sum(
+            len(self.tokenizer_fn(str(message.content))) for message in head)
+        while len(recent) > 1 and sum(
+                len(self.tokenizer_fn(str(message.content)))
+                for message in recent) > budget:
+            recent = recent[1:]
+        while len(recent) > 1 and recent[0].role == MessageRole.ASSISTANT:
+            recent = recent[1:]
+        return head + recent
+
+    def needs_compaction(self) -> bool:
+        return bool(self._split(self.get_all())[1])
+
+    async def acompact(self, llm: LLM) -> None:
+        """Fold the messages older than the recent ones into the summary."""
+        if self._compacting:
+            return
+        self._compacting = True
+        try:
+            messages = self.get_all()
+            summary, old, _ = self._split(messages)
+            if not old:
+                return
+            prompt = SUMMARY_PROMPT.format(
+                max_words=self.summary_max_words,
+                summary=summary.content if summary else "",
+                messages="\n".join(
+                    f"{message.role.value}: {message.content}" for message in old))
+            response = await llm.acomplete(prompt)
+
+            folded = len(old) + (1 if summary else 0)
+            current = self.get_all()
+            if current[:folded] != messages[:folded]:
+                # Reset or restored while the summary was being written
+                return
+            self.set([ChatMessage(
+                role=MessageRole.SYSTEM,
+                content=f"Summary of the earlier conversation:\n"
+                        f"{response.text.strip()}",
+                additional_kwargs={"summary": True},
+            )] + current[folded:])
+        finally:
+            self._compacting = False
+
+
+class ChatMemoryStore:
+    """Chat memories keyed by (bot_id, session_id) with bounded size.
+
+    At most max_sessions memories stay live, ordered by last use; the least
+    recently used one is evicted when a new session arrives, and sessions
+    idle for longer than idle_ttl seconds are dropped. With a spill_path,
+    evicted sessions are written to SQLite and restored on their next turn.
+
+    With summarize, memories are SummarizingMemory instances keeping
+    recent_messages messages verbatim; otherwise plain ChatMemoryBuffers.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600,
+                 token_limit: int = 2000, spill_path: Optional[str] = None,
+                 spill_ttl: float = 7 * 24 * 3600, summarize: bool = False,
+                 recent_messages: int = 6, summary_max_words: int = 200):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.token_limit = token_limit
+        self.summarize = summarize
+        self.recent_messages = recent_messages
+        self.summary_max_words = summary_max_words
+        self.spill_ttl = spill_ttl
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[SessionKey, Tuple[ChatMemoryBuffer, float]]" = OrderedDict()
+        self._conn = None
+
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(spill_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "bot_id TEXT NOT NULL, session_id TEXT NOT NULL, "
+                "messages TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (bot_id, session_id))"
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, bot_id: str, session_id: str) -> ChatMemoryBuffer:
+        """Return the memory of a conversation, creating it if needed."""
+        key = (bot_id, session_id)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+
+            if key in self._sessions:
+                memory, _ = self._sessions.pop(key)
+            else:
+                memory = self._restore(key) or self._new_memory()
+
+            self._sessions[key] = (memory, now)
+            while len(self._sessions) > self.max_sessions:
+                evicted_key, (evicted, _) = self._sessions.popitem(last=False)
+                self._spill(evicted_key, evicted)
+            return memory
+
+    def reset(self, bot_id: str, session_id: Optional[str] = None) -> None:
+        """Forget one conversation, or every conversation of a bot."""
+        with self._lock:
+            for key in list(self._sessions):
+                if key[0] == bot_id and session_id in (None, key[1]):
+                    del self._sessions[key]
+
+            if self._conn is not None:
+                if session_id is None:
+                    self._conn.execute(
+                        "DELETE FROM sessions WHERE bot_id = ?", (bot_id,))
+                else:
+                    self._conn.execute(
+                        "DELETE FROM sessions WHERE bot_id = ? AND session_id = ?",
+                        (bot_id, session_id))
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Spill every live conversation and close the spill database."""
+        with self._lock:
+            while self._sessions:
+                key, (memory, _) = self._sessions.popitem(last=False)
+                self._spill(key, memory)
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _new_memory(self, chat_history=None) -> ChatMemoryBuffer:
+        if not self.summarize:
+            return ChatMemoryBuffer.from_defaults(
+                chat_history=chat_history, token_limit=self.token_limit)
+        memory = SummarizingMemory.from_defaults(
+            chat_history=chat_history, token_limit=self.token_limit)
+        memory.recent_messages = self.recent_messages
+        memory.summary_max_words = self.summary_max_words
+        return memory
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in last-use order, so idle ones sit at the front
+        while self._sessions:
+            key, (memory, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.idle_ttl:
+                break
+            del self._sessions[key]
+            self._spill(key, memory)
+
+    def _spill(self, key: SessionKey, memory: ChatMemoryBuffer) -> None:
+        if self._conn is None:
+            return
+        messages = memory.get_all()
+        if not messages:
+            return
+        try:
+            payload = json.dumps(
+                [message.model_dump(mode="json") for message in messages])
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions "
+                "(bot_id, session_id, messages, updated_at) VALUES (?, ?, ?, ?)",
+                (*key, payload, now))
+            self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?",
+                (now - self.spill_ttl,))
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"Could not spill chat session {key}: {e}")
+
+    def _restore(self, key: SessionKey) -> Optional[ChatMemoryBuffer]:
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT messages FROM sessions WHERE bot_id = ? AND session_id = ?",
+            key).fetchone()
+        if row is None:
+            return None
+        try:
+            history = [ChatMessage.model_validate(m) for m in json.loads(row[0])]
+            return self._new_memory(history)
+        except Exception as e:
+            logger.warning(f"Could not restore chat session {key}: {e}")
+            return None
@@ -0,0 +1,369 @@
+# backend/services/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMChatStartEvent,
+    LLMCompletionEndEvent,
+    LLMCompletionStartEvent,
+)
+from llama_index.core.instrumentation.events.retrieval import (
+    RetrievalEndEvent,
+    RetrievalStartEvent,
+)
+from pydantic import PrivateAttr
+from starlette.routing import BaseRoute, Match
+
+# Bot whose work is running in this task or thread, used as the "bot" label
+# by code that has no bot_id at hand (embeddings, LLM and retrieval calls)
+current_bot: ContextVar[str] = ContextVar("current_bot", default="none")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str,
+                 label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} "
+                             f"{_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count above the last], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the enclosed block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket"
+                                 f"{_format_labels(self.label_names, key, le)} "
+                                 f"{cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, documentation: str,
+                label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str,
+              label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str,
+                  label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(
+            Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until the last byte of the response was sent.",
+    ("method", "route", "status", "bot"))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "Requests being handled.", ("route", "bot"))
+RETRIEVAL_SECONDS = registry.histogram(
+    "retrieval_duration_seconds", "Vector store retrieval time.", ("bot",))
+LLM_SECONDS = registry.histogram(
+    "llm_duration_seconds",
+    "LLM call time, up to the last token for streamed calls.", ("bot", "call"))
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Prompt and completion tokens sent to and received "
+    "from the LLM.", ("bot", "kind"))
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "embedding_batch_size", "Texts per embedding request, before the cache.",
+    ("bot", "kind"), buckets=SIZE_BUCKETS)
+EMBEDDING_SECONDS = registry.histogram(
+    "embedding_duration_seconds",
+    "Time of embedding requests sent to the provider.", ("bot", "kind"))
+INGESTION_STAGE_SECONDS = registry.histogram(
+    "ingestion_stage_duration_seconds",
+    "Time per ingestion stage: parse and chunk per file, embed, write and "
+    "keyword indexing per batch.", ("bot", "stage"))
+INGESTION_CHUNKS = registry.counter(
+    "ingestion_chunks_total", "Chunks written to the vector store.", ("bot",))
+INGESTION_JOB_SECONDS = registry.histogram(
+    "ingestion_job_duration_seconds", "Run time of ingestion jobs.",
+    ("bot", "state"))
+INGESTION_JOBS_RUNNING = registry.gauge(
+    "ingestion_jobs_running", "Ingestion jobs being run.", ("bot",))
+CONTEXT_TOKENS = registry.counter(
+    "context_tokens_total",
+    "Tokens of retrieved chunks, and of the ones sent to the LLM after "
+    "reranking, deduplication and trimming.", ("bot", "kind"))
+LLM_SLOTS_IN_USE = registry.gauge(
+    "llm_scheduler_active", "Chat requests holding an LLM slot.", ("bot",))
+LLM_QUEUE_DEPTH = registry.gauge(
+    "llm_scheduler_queue_depth", "Chat requests waiting for an LLM slot.",
+    ("bot",))
+LLM_QUEUE_WAIT_SECONDS = registry.histogram(
+    "llm_scheduler_wait_seconds", "Time chat requests waited for an LLM slot.",
+    ("bot",))
+LLM_QUEUE_REJECTIONS = registry.counter(
+    "llm_scheduler_rejections_total",
+    "Chat requests answered with 429 because the queue was full or the "
+    "wait timed out.", ("bot", "reason"))
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total",
+    "Lookups in the embedding, answer and parsed-text caches.",
+    ("cache", "bot", "result"))
+
+
+class LLMMetricsHandler(BaseEventHandler):
+    """Times retrieval and LLM calls from LlamaIndex instrumentation events.
+
+    Start and end events of the same call share a span ID. Token counts come
+    from the provider's usage report when the response carries one, and are
+    counted with Settings.tokenizer otherwise (e.g. for streamed calls).
+    """
+
+    _started: Dict[Tuple[str, str], float] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMMetricsHandler"
+
+    def handle(self, event: BaseEvent, **kwargs) -> None:
+        if isinstance(event, RetrievalStartEvent):
+            self._start(event, "retrieval")
+        elif isinstance(event, RetrievalEndEvent):
+            elapsed = self._stop(event, "retrieval")
+            if elapsed is not None:
+                RETRIEVAL_SECONDS.observe(elapsed, bot=current_bot.get())
+        elif isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            self._start(event, "llm")
+        elif isinstance(event, LLMChatEndEvent):
+            self._llm_end(event, "chat", event.response,
+                          "\n".join(str(m.content or "") for m in event.messages))
+        elif isinstance(event, LLMCompletionEndEvent):
+            self._llm_end(event, "completion", event.response, event.prompt)
+
+    def _start(self, event: BaseEvent, kind: str) -> None:
+        with self._lock:
+            self._started[(event.span_id, kind)] = time.perf_counter()
+
+    def _stop(self, event: BaseEvent, kind: str) -> Optional[float]:
+        with self._lock:
+            started = self._started.pop((event.span_id, kind), None)
+        return None if started is None else time.perf_counter() - started
+
+    def _llm_end(self, event: BaseEvent, call: str, response, prompt: str) -> None:
+        bot = current_bot.get()
+        elapsed = self._stop(event, "llm")
+        if elapsed is not None:
+            LLM_SECONDS.observe(elapsed, bot=bot, call=call)
+        if response is None:
+            return
+
+        usage = self._usage(getattr(response, "raw", None))
+        if usage:
+            prompt_tokens, completion_tokens = usage
+        else:
+            text = (response.message.content if call == "chat" else response.text)
+            prompt_tokens = len(Settings.tokenizer(prompt))
+            completion_tokens = len(Settings.tokenizer(text or ""))
+        LLM_TOKENS.inc(prompt_tokens, bot=bot, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, bot=bot, kind="completion")
+
+    @staticmethod
+    def _usage(raw) -> Optional[Tuple[int, int]]:
+        usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+        if usage is None:
+            return None
+        if isinstance(usage, dict):
+            return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        return (getattr(usage, "prompt_tokens", 0) or 0,
+                getattr(usage, "completion_tokens", 0) or 0)
+
+
+def install_llm_metrics() -> None:
+    """Attach the retrieval and LLM timing handler to LlamaIndex, once."""
+    dispatcher = get_dispatcher()
+    if not any(isinstance(h, LLMMetricsHandler) for h in dispatcher.event_handlers):
+        dispatcher.add_event_handler(LLMMetricsHandler())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and in-flight requests.
+
+    Requests are labelled with the matching route's template rather than the
+    raw path, and with its bot_id path parameter when it has one. IDs of bots
+    the app's BotManager does not know are labelled "unknown", so requests
+    for made-up bots cannot add label sets without bound. Latency runs until
+    the response has been sent, so streamed responses count in full.
+    """
+
+    def __init__(self, app, routes: Sequence[BaseRoute]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        labels = self._labels(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc(**labels)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(**labels)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"],
+                status=str(status["code"]), **labels)
+
+    def _labels(self, scope) -> Dict[str, str]:
+        for route in self.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                bot_id = child_scope.get("path_params", {}).get("bot_id")
+                return {"route": getattr(route, "path", "unmatched"),
+                        "bot": self._bot_label(scope, bot_id)}
+        return {"route": "unmatched", "bot": "none"}
+
+    @staticmethod
+    def _bot_label(scope, bot_id: Optional[str]) -> str:
+        if bot_id is None:
+            return "none"
+        state = getattr(scope.get("app"), "state", None)
+        bot_manager = getattr(state, "bot_manager", None)
+        if bot_manager is None or bot_id not in bot_manager.bots:
+            return "unknown"
+        return bot_id
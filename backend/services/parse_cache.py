@@ -0,0 +1,115 @@
+# backend/services/parse_cache.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import List, Optional
+
+from llama_index.core import Document
+from llama_index.core.readers.file.base import default_file_metadata_func
+
+logger = logging.getLogger(__name__)
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+# Bump the trailing number when parse_file changes how documents are built
+PARSER_VERSION = hashlib.sha256(
+    f"{_package_version('llama-index-core')}:"
+    f"{_package_version('llama-index-readers-file')}:1".encode()
+).hexdigest()[:12]
+
+
+class ParsedTextCache:
+    """Gzipped JSON copies of the documents extracted from each file.
+
+    Entries are keyed by the file's content hash and the parser version, so
+    re-ingesting an unchanged file after a chunking change, a model change or
+    a collection reset skips parsing. On a hit the path-dependent parts (the
+    document IDs and file metadata) are rebuilt for the file being ingested.
+    The least recently used entries are deleted once the cache grows past
+    max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, digest: str, file_path: str) -> Optional[List[Document]]:
+        path = self._entry_path(digest)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        source = entry["path"]
+        target = str(Path(file_path))
+        file_metadata = default_file_metadata_func(target)
+        documents = []
+        for data in entry["documents"]:
+            doc = Document.from_dict(data)
+            if doc.id_.startswith(source):
+                doc.id_ = target + doc.id_[len(source):]
+            doc.metadata.update(file_metadata)
+            documents.append(doc)
+        return documents
+
+    def put(self, digest: str, file_path: str, documents: List[Document]) -> None:
+        path = self._entry_path(digest)
+        entry = {
+            "path": str(Path(file_path)),
+            "documents": [doc.to_dict() for doc in documents],
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache entry {path}: {e}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}-{PARSER_VERSION}.json.gz")
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".json.gz"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,170 @@
+# benchmarks/fakes.py
+"""Deterministic local stand-ins for the OpenAI LLM and embedding model.
+
+Both produce the same output for the same input and sleep for a
+configurable time to mimic network latency, so benchmark runs are
+comparable without calling any external service.
+"""
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, List, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+    MessageRole,
+)
+from llama_index.core.llms import CustomLLM
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+
+WORDS = (
+    "derecho ley artículo norma tribunal pena código juez sentencia proceso "
+    "garantía libertad delito recurso prueba acción principio estado persona "
+    "constitución tratado interpretación doctrina jurisprudencia"
+).split()
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+class FakeLLM(CustomLLM):
+    """Chat model that answers with words chosen from a hash of the prompt."""
+
+    first_token_latency: float = 0.2
+    token_latency: float = 0.01
+    num_output_tokens: int = 64
+    context_window: int = 16385
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(
+            context_window=self.context_window,
+            num_output=self.num_output_tokens,
+            is_chat_model=True,
+            model_name="fake-llm",
+        )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeLLM"
+
+    def _tokens(self, prompt: str) -> List[str]:
+        seed = _seed(prompt)
+        return [
+            WORDS[((seed >> (i % 48)) + i) % len(WORDS)] + " "
+            for i in range(self.num_output_tokens)
+        ]
+
+    @staticmethod
+    def _prompt(messages: Sequence[ChatMessage]) -> str:
+        return "\n".join(f"{m.role.value}: {m.content}" for m in messages)
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self.first_token_latency + self.token_latency * self.num_output_tokens)
+        return CompletionResponse(text="".join(self._tokens(prompt)).strip())
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        def gen() -> CompletionResponseGen:
+            time.sleep(self.first_token_latency)
+            text = ""
+            for token in self._tokens(prompt):
+                time.sleep(self.token_latency)
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+        return gen()
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        await asyncio.sleep(self.first_token_latency + self.token_latency * self.num_output_tokens)
+        return CompletionResponse(text="".join(self._tokens(prompt)).strip())
+
+    @llm_completion_callback()
+    async def astream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseAsyncGen:
+        async def gen() -> CompletionResponseAsyncGen:
+            await asyncio.sleep(self.first_token_latency)
+            text = ""
+            for token in self._tokens(prompt):
+                await asyncio.sleep(self.token_latency)
+                text += token
+                yield CompletionResponse(text=text, delta=token)
+        return gen()
+
+    @llm_chat_callback()
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = self.complete(self._prompt(messages))
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=response.text))
+
+    @llm_chat_callback()
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseGen:
+        def gen() -> ChatResponseGen:
+            for response in self.stream_complete(self._prompt(messages)):
+                yield ChatResponse(
+                    message=ChatMessage(role=MessageRole.ASSISTANT, content=response.text),
+                    delta=response.delta,
+                )
+        return gen()
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        response = await self.acomplete(self._prompt(messages))
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=response.text))
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseAsyncGen:
+        async def gen() -> ChatResponseAsyncGen:
+            async for response in await self.astream_complete(self._prompt(messages)):
+                yield ChatResponse(
+                    message=ChatMessage(role=MessageRole.ASSISTANT, content=response.text),
+                    delta=response.delta,
+                )
+        return gen()
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Hashed bag-of-words embeddings with a fixed delay per request."""
+
+    model_name: str = "fake-embedding"
+    embed_dim: int = 256
+    request_latency: float = 0.05
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeEmbedding"
+
+    def _embed(self, text: str) -> Embedding:
+        vector = [0.0] * self.embed_dim
+        for token in _TOKEN_RE.findall(text.lower()):
+            seed = _seed(token)
+            vector[seed % self.embed_dim] += 1.0 if seed & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._get_text_embeddings([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return (await self._aget_text_embeddings([query]))[0]
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        time.sleep(self.request_latency)
+        return [self._embed(text) for text in texts]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        await asyncio.sleep(self.request_latency)
+        return [self._embed(text) for text in texts]
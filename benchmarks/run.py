@@ -0,0 +1,263 @@
+# benchmarks/run.py
+"""Offline benchmark of ingestion throughput and chat latency.
+
+Runs the FastAPI app in-process with deterministic fakes in place of the
+OpenAI LLM and embedding model, so no network access or API key is needed:
+
+    python -m benchmarks.run --corpus-sizes 10,50 --concurrency 1,8 \
+        --requests 64 --output results.json
+
+All state (Chroma data, manifests, caches, bot data dirs) is written to a
+temporary directory that is removed afterwards.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_ID = "bot1"
+TERMINAL_STATES = ("succeeded", "failed")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus-sizes", default="10,50",
+                        help="comma-separated numbers of documents to ingest")
+    parser.add_argument("--doc-words", type=int, default=1500,
+                        help="words per synthetic document")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="comma-separated numbers of concurrent chat clients")
+    parser.add_argument("--requests", type=int, default=64,
+                        help="chat requests per concurrency level")
+    parser.add_argument("--llm-first-token", type=float, default=0.2,
+                        help="fake LLM latency before the first token (s)")
+    parser.add_argument("--llm-token", type=float, default=0.005,
+                        help="fake LLM latency per output token (s)")
+    parser.add_argument("--llm-tokens", type=int, default=64,
+                        help="tokens in each fake LLM answer")
+    parser.add_argument("--embed-latency", type=float, default=0.05,
+                        help="fake embedding latency per request (s)")
+    parser.add_argument("--answer-cache", action="store_true",
+                        help="keep the bot's semantic answer cache enabled")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its reaped children."""
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def synthetic_document(seed: int, words: int) -> str:
+    """Deterministic pseudo-legal text; different seeds share no documents."""
+    from benchmarks.fakes import WORDS
+
+    lines = [f"Documento de prueba {seed}."]
+    state = seed * 2654435761 % 2 ** 32 or 1
+    sentence = []
+    for i in range(words):
+        # xorshift32 keeps the corpus identical across runs and platforms
+        state ^= (state << 13) & 0xFFFFFFFF
+        state ^= state >> 17
+        state ^= (state << 5) & 0xFFFFFFFF
+        sentence.append(WORDS[state % len(WORDS)])
+        if len(sentence) == 12 or i == words - 1:
+            lines.append(" ".join(sentence).capitalize() + f" {seed}-{i}.")
+            sentence = []
+    return "\n".join(lines)
+
+
+def chat_queries(count: int) -> List[str]:
+    from benchmarks.fakes import WORDS
+
+    return [
+        f"¿Qué establece {WORDS[i % len(WORDS)]} sobre "
+        f"{WORDS[(i * 7 + 3) % len(WORDS)]} en el caso {i}?"
+        for i in range(count)
+    ]
+
+
+async def wait_for_job(client, job_id: str, poll_interval: float = 0.05) -> dict:
+    while True:
+        response = await client.get(f"/jobs/{job_id}")
+        response.raise_for_status()
+        job = response.json()
+        if job["state"] in TERMINAL_STATES:
+            return job
+        await asyncio.sleep(poll_interval)
+
+
+async def bench_ingestion(client, corpus_size: int, doc_words: int) -> dict:
+    files = [
+        ("files", (f"bench-{corpus_size}-{i}.txt",
+                   synthetic_document(corpus_size * 100_000 + i, doc_words).encode("utf-8"),
+                   "text/plain"))
+        for i in range(corpus_size)
+    ]
+    started = time.perf_counter()
+    response = await client.post(f"/upload/{BOT_ID}/batch", files=files)
+    response.raise_for_status()
+    job = await wait_for_job(client, response.json()["job_id"])
+    elapsed = time.perf_counter() - started
+    if job["state"] != "succeeded":
+        raise RuntimeError(f"Ingestion job failed: {job['error']}")
+
+    return {
+        "documents": corpus_size,
+        "chunks": job["chunks_embedded"],
+        "seconds": round(elapsed, 3),
+        "job_seconds": job["elapsed_seconds"],
+        "docs_per_sec": round(corpus_size / elapsed, 2),
+        "chunks_per_sec": round(job["chunks_embedded"] / elapsed, 2),
+    }
+
+
+async def bench_chat(client, concurrency: int, queries: List[str]) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(query: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"/chat/{BOT_ID}", json={"query": query})
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(queries),
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def clear_documents(client) -> None:
+    response = await client.get(f"/documents/{BOT_ID}")
+    response.raise_for_status()
+    for filename in response.json()["documents"]:
+        await client.delete(f"/documents/{BOT_ID}/{filename}")
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from llama_index.core import Settings
+
+    from benchmarks.fakes import FakeEmbedding, FakeLLM
+
+    from backend.app import create_app
+
+    app = create_app()
+    # Set after create_app configures OpenAI, and before the lifespan wraps
+    # the embedding model in the cache
+    Settings.llm = FakeLLM(
+        first_token_latency=args.llm_first_token,
+        token_latency=args.llm_token,
+        num_output_tokens=args.llm_tokens,
+    )
+    Settings.embed_model = FakeEmbedding(request_latency=args.embed_latency)
+
+    results = {"ingestion": [], "chat": []}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        bot_manager = app.state.bot_manager
+        if not args.answer_cache:
+            for bot in bot_manager.bots.values():
+                bot.answer_cache = False
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=None) as client:
+            for corpus_size in int_list(args.corpus_sizes):
+                await clear_documents(client)
+                ingestion = await bench_ingestion(client, corpus_size, args.doc_words)
+                results["ingestion"].append(ingestion)
+                print(f"ingest {corpus_size} docs: {ingestion['docs_per_sec']} docs/s, "
+                      f"{ingestion['chunks_per_sec']} chunks/s")
+
+                for concurrency in int_list(args.concurrency):
+                    chat = await bench_chat(
+                        client, concurrency, chat_queries(args.requests))
+                    chat["corpus_size"] = corpus_size
+                    results["chat"].append(chat)
+                    print(f"chat corpus={corpus_size} c={concurrency}: "
+                          f"{chat['rps']} req/s, p50 {chat['p50_ms']} ms, "
+                          f"p95 {chat['p95_ms']} ms, p99 {chat['p99_ms']} ms")
+            await clear_documents(client)
+        results["embedding_cache"] = bot_manager.embedding_cache.stats()
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark-offline")
+    logging.basicConfig(level=logging.WARNING)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as workdir:
+        # The settings use paths relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": vars(args),
+        **results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
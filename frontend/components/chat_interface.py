@@ -1,6 +1,11 @@
+import time
+from datetime import datetime
 import streamlit as st
 from services.session_manager import SessionManager
 
+# Seconds between redraws of a reply that is still streaming
+STREAM_RENDER_INTERVAL = 0.05
+
 
 def chat_interface(selected_bot_id: str):
     st.container()
@@ -33,12 +38,12 @@ def chat_interface(selected_bot_id: str):
             if submit_button and user_input.strip() and documents:  # Extra check for documents
                 current_message = user_input.strip()
                 handle_user_input(selected_bot_id, current_message)
+                # The messages container is drawn below, in this same run
                 st.session_state.pending_message = {
                     "bot_id": selected_bot_id,
                     "message": current_message,
                     "processed": False
                 }
-                st.rerun()
 
     # Display messages and process responses in the messages container
     with messages_container:
@@ -48,27 +53,30 @@ def chat_interface(selected_bot_id: str):
 
         # Display chat messages
         for message in st.session_state.bot_messages.get(selected_bot_id, []):
-            role_class = "user-message" if message["role"] == "user" else "assistant-message"
-            st.markdown(f"""
-                <div class="{role_class}">
-                    <div class="message-content">{message["content"]}</div>
-                    <div class="timestamp">{message["timestamp"]}</div>
-                </div>
-            """, unsafe_allow_html=True)
+            render_message(st, message["role"], message["content"],
+                           message["timestamp"])
 
         # Process pending message if exists
         if hasattr(st.session_state, 'pending_message') and \
            st.session_state.pending_message.get("bot_id") == selected_bot_id and \
            not st.session_state.pending_message.get("processed", False):
-            with st.spinner("Procesando respuesta..."):
-                response = handle_bot_response(
-                    st.session_state.get('api_client'),
-                    selected_bot_id,
-                    st.session_state.pending_message["message"]
-                )
-                st.session_state.pending_message["processed"] = True
-                if response:
-                    st.rerun()
+            st.session_state.pending_message["processed"] = True
+            handle_bot_response(
+                st.session_state.get('api_client'),
+                selected_bot_id,
+                st.session_state.pending_message["message"]
+            )
+
+
+def render_message(target, role: str, content: str, timestamp: str):
+    """Draw one message into a container or an st.empty() placeholder."""
+    role_class = "user-message" if role == "user" else "assistant-message"
+    target.markdown(f"""
+        <div class="{role_class}">
+            <div class="message-content">{content}</div>
+            <div class="timestamp">{timestamp}</div>
+        </div>
+    """, unsafe_allow_html=True)
 
 
 def handle_user_input(bot_id: str, message: str):
@@ -76,8 +84,28 @@ def handle_user_input(bot_id: str, message: str):
 
 
 def handle_bot_response(api_client, bot_id: str, message: str):
-    response = api_client.send_message(bot_id, message)
-    if response and "response" in response:
-        SessionManager.add_message(bot_id, "assistant", response["response"])
-        return True
-    return False
+    """Stream the reply into a placeholder, then keep it in the session."""
+    placeholder = st.empty()
+    timestamp = datetime.now().strftime("%H:%M")
+    render_message(placeholder, "assistant", "Procesando respuesta...", timestamp)
+
+    text = ""
+    last_render = 0.0
+    for event, data in api_client.stream_message(
+            bot_id, message, st.session_state.get("session_id")):
+        if event == "token":
+            text += data["token"]
+            # Redrawing on every token costs more than the tokens arrive
+            if time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+                render_message(placeholder, "assistant", text + "▌", timestamp)
+                last_render = time.monotonic()
+        elif event == "done":
+            text = data["response"]
+        elif event == "error":
+            placeholder.error(
+                data.get("detail") or "Error al procesar la respuesta")
+            return False
+
+    render_message(placeholder, "assistant", text, timestamp)
+    SessionManager.add_message(bot_id, "assistant", text)
+    return True
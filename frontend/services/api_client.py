@@ -1,55 +1,169 @@
+import json
+import time
+from typing import Iterator, Tuple
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds; chat and upload wait on the LLM and
+# on streaming the file, so they get a longer read timeout
+TIMEOUT = (3.05, 15)
+LONG_TIMEOUT = (3.05, 300)
+# Seconds a bot or document list is reused before asking the API again
+BOTS_TTL = 300
+DOCUMENTS_TTL = 30
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive connection pool per Streamlit process."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Errors are raised rather than returned so they are never cached
+
+@st.cache_data(ttl=BOTS_TTL, show_spinner=False)
+def _fetch_bots(base_url: str) -> list:
+    response = get_session().get(f"{base_url}/bots", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("bots", [])
+
+
+@st.cache_data(ttl=DOCUMENTS_TTL, show_spinner=False)
+def _fetch_documents(base_url: str, bot_id: str) -> list:
+    response = get_session().get(
+        f"{base_url}/documents/{bot_id}", timeout=TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("documents", [])
 
 
 class APIClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
+        self.session = get_session()
 
     def fetch_bots(self) -> list:
-        """Fetch available bots from the API."""
+        """Fetch available bots from the API, cached for BOTS_TTL seconds."""
         try:
-            response = requests.get(f"{self.base_url}/bots")
-            if response.status_code == 200:
-                return response.json().get("bots", [])
-            return []
+            return _fetch_bots(self.base_url)
         except Exception as e:
             st.error(f"Error fetching bots: {e}")
             return []
 
     def fetch_documents(self, bot_id: str) -> list:
-        """Fetch documents for a specific bot."""
+        """Fetch a bot's documents, cached until they change or DOCUMENTS_TTL."""
         try:
-            response = requests.get(f"{self.base_url}/documents/{bot_id}")
-            if response.status_code == 200:
-                return response.json().get("documents", [])
-            return []
+            return _fetch_documents(self.base_url, bot_id)
         except Exception as e:
             st.error(f"Error fetching documents: {e}")
             return []
 
-    def send_message(self, bot_id: str, message: str):
+    def invalidate_documents(self, bot_id: str) -> None:
+        _fetch_documents.clear(self.base_url, bot_id)
+
+    def send_message(self, bot_id: str, message: str, session_id: str = None):
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/{bot_id}",
-                json={"query": message}
+                json={"query": message, "session_id": session_id},
+                timeout=LONG_TIMEOUT
             )
             return response.json() if response.ok else None
         except Exception as e:
             st.error(f"Error sending message: {e}")
             return None
 
-    def upload_document(self, bot_id: str, file) -> dict:
-        """Upload a document for a specific bot."""
+    def stream_message(self, bot_id: str, message: str,
+                       session_id: str = None) -> Iterator[Tuple[str, dict]]:
+        """Yield (event, data) pairs from the streaming chat endpoint.
+
+        Events are "sources", then "token" once per token, then "done" with
+        the full response or "error".
+        """
         try:
-            files = {"file": file}
-            # Update URL to match backend route
-            response = requests.post(
-                f"{self.base_url}/documents/upload/{bot_id}",
-                files=files
+            with self.session.post(
+                f"{self.base_url}/chat/{bot_id}/stream",
+                json={"query": message, "session_id": session_id},
+                stream=True,
+                timeout=LONG_TIMEOUT
+            ) as response:
+                if response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After", "unos")
+                    yield "error", {"detail": "El asistente está ocupado, "
+                                    f"reintenta en {retry_after} segundos"}
+                    return
+                if not response.ok:
+                    yield "error", {"detail": "Error al procesar la respuesta "
+                                    f"(HTTP {response.status_code})"}
+                    return
+                # text/event-stream has no charset, which requests reads as latin-1
+                response.encoding = "utf-8"
+                event = "token"
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line:
+                        event = "token"
+                    elif line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[len("data:"):])
+        except Exception as e:
+            st.error(f"Error sending message: {e}")
+            yield "error", {"detail": str(e)}
+
+    def upload_document(self, bot_id: str, filename: str, content: bytes) -> dict:
+        """Upload a document for a specific bot and return its ingestion job."""
+        try:
+            response = self.session.post(
+                f"{self.base_url}/upload/{bot_id}",
+                files={"file": (filename, content)},
+                timeout=LONG_TIMEOUT
             )
             response.raise_for_status()
             return response.json()
         except Exception as e:
             st.error(f"Error uploading document: {e}")
             return {}
+        finally:
+            self.invalidate_documents(bot_id)
+
+    def delete_document(self, bot_id: str, filename: str) -> bool:
+        """Delete a document and its vectors; True if the API removed it."""
+        try:
+            response = self.session.delete(
+                f"{self.base_url}/documents/{bot_id}/{filename}",
+                timeout=LONG_TIMEOUT
+            )
+            return response.status_code == 200
+        except Exception as e:
+            st.error(f"Error deleting document: {e}")
+            return False
+        finally:
+            self.invalidate_documents(bot_id)
+
+    def get_job(self, job_id: str) -> dict:
+        """Fetch the status of an ingestion job."""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/jobs/{job_id}", timeout=TIMEOUT)
+            if response.status_code == 200:
+                return response.json()
+            return {}
+        except Exception as e:
+            st.error(f"Error fetching job status: {e}")
+            return {}
+
+    def wait_for_job(self, job_id: str, poll_interval: float = 1.0,
+                     timeout: float = 900) -> dict:
+        """Poll an ingestion job until it succeeds, fails or times out."""
+        deadline = time.time() + timeout
+        job = {}
+        while time.time() < deadline:
+            job = self.get_job(job_id)
+            if not job or job.get("state") in ("succeeded", "failed"):
+                return job
+            time.sleep(poll_interval)
+        return job
@@ -1,3 +1,4 @@
+import uuid
 import streamlit as st
 from datetime import datetime
 
@@ -11,6 +12,9 @@ class SessionManager:
             st.session_state.bot_messages = {}
         if "uploaded_files" not in st.session_state:
             st.session_state.uploaded_files = set()
+        if "session_id" not in st.session_state:
+            # Identifies this browser session's conversations to the API
+            st.session_state.session_id = uuid.uuid4().hex
 
     @staticmethod
     def add_message(bot_id: str, role: str, content: str):
@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+
+import pytest
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-offline")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """The app with fake LLM and embeddings, keeping its state in tmp_path."""
+    from fastapi.testclient import TestClient
+    from llama_index.core import Settings
+
+    from backend.app import create_app
+    from benchmarks.fakes import FakeEmbedding, FakeLLM
+
+    # The settings use paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    app = create_app()
+    # Set before the lifespan wraps the embedding model in the cache
+    Settings.llm = FakeLLM(first_token_latency=0.0, token_latency=0.0)
+    Settings.embed_model = FakeEmbedding(request_latency=0.0)
+    with TestClient(app) as client:
+        yield client
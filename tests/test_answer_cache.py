@@ -0,0 +1,39 @@
+# tests/test_answer_cache.py
+from backend.services.answer_cache import SemanticAnswerCache, exact_terms
+
+EMBEDDING = [1.0, 0.0, 0.0]
+CLOSE = [0.999, 0.02, 0.0]
+
+
+def test_hit_for_similar_query_with_same_terms():
+    cache = SemanticAnswerCache(threshold=0.95)
+    query = "¿Qué establece el artículo 79?"
+    cache.store("bot1", 1, EMBEDDING, {"response": "a"}, exact_terms(query))
+
+    assert cache.lookup("bot1", 1, CLOSE, exact_terms(query)) == {"response": "a"}
+
+
+def test_miss_for_other_article_however_similar():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("bot1", 1, EMBEDDING, {"response": "a"},
+                exact_terms("¿Qué establece el artículo 79?"))
+
+    assert cache.lookup("bot1", 1, EMBEDDING,
+                        exact_terms("¿Qué establece el artículo 80?")) is None
+
+
+def test_best_entry_with_matching_terms_wins():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("bot1", 1, EMBEDDING, {"response": "79"},
+                exact_terms("artículo 79 de la ley 26994"))
+    cache.store("bot1", 1, CLOSE, {"response": "80"},
+                exact_terms("artículo 80 de la ley 26994"))
+
+    assert cache.lookup("bot1", 1, EMBEDDING, exact_terms(
+        "¿Qué dice el art. 80 de la ley 26994?")) == {"response": "80"}
+
+
+def test_exact_terms_normalize_article_forms_and_numbers():
+    assert exact_terms("art. 079") == exact_terms("Artículo 79")
+    assert exact_terms("artículo 79") != exact_terms("ley 79")
+    assert exact_terms("plazo de 10 días") != exact_terms("plazo de 15 días")
@@ -0,0 +1,37 @@
+# tests/test_bots.py
+NEW_BOT = {"id": "bot3", "name": "Bot 3", "system_prompt": "Responde en español."}
+
+
+def test_create_bot(client):
+    response = client.post("/bots", json=NEW_BOT)
+
+    assert response.status_code == 201
+    assert response.json()["data_dir"] == "./data_bot3"
+    assert client.get("/bots/bot3").status_code == 200
+
+
+def test_create_existing_bot_conflicts(client):
+    assert client.post("/bots", json=NEW_BOT).status_code == 201
+
+    response = client.post("/bots", json=NEW_BOT)
+
+    assert response.status_code == 409
+    assert "bot3" in response.json()["detail"]
+
+
+def test_create_default_bot_again_conflicts(client):
+    response = client.post("/bots", json={**NEW_BOT, "id": "bot1"})
+
+    assert response.status_code == 409
+
+
+def test_create_bot_over_existing_files_conflicts(client, tmp_path):
+    data_dir = tmp_path / "data_bot3"
+    data_dir.mkdir()
+    (data_dir / "ley.txt").write_text("Artículo 1.", encoding="utf-8")
+
+    response = client.post("/bots", json=NEW_BOT)
+
+    assert response.status_code == 409
+    assert client.get("/bots/bot3").status_code == 404
+    assert (data_dir / "ley.txt").exists()
@@ -0,0 +1,51 @@
+# tests/test_hybrid_retriever.py
+import asyncio
+import time
+
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from backend.services.hybrid_retriever import HybridRetriever
+from backend.services.keyword_index import KeywordIndex
+
+
+class SlowRetriever(BaseRetriever):
+    """Vector retriever whose query blocks like a slow Chroma query."""
+
+    def _retrieve(self, query_bundle):
+        time.sleep(1.0)
+        return [NodeWithScore(node=TextNode(text="vector", id_="vector"), score=1.0)]
+
+    async def _aretrieve(self, query_bundle):
+        return self._retrieve(query_bundle)
+
+
+def test_slow_vector_query_falls_back_to_keywords(tmp_path):
+    keyword_index = KeywordIndex(str(tmp_path / "keywords.db"))
+    keyword_index.add("bot1", [TextNode(text="plazo de prescripción", id_="kw")])
+    retriever = HybridRetriever("bot1", SlowRetriever(), keyword_index,
+                                vector_timeout=0.2)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        results = await retriever.aretrieve(QueryBundle("prescripción"))
+        elapsed = time.monotonic() - started
+        task.cancel()
+        return results, elapsed, ticks
+
+    results, elapsed, ticks = asyncio.run(main())
+    keyword_index.close()
+
+    assert [result.node.node_id for result in results] == ["kw"]
+    assert elapsed < 0.8
+    # The event loop kept serving other tasks during the vector query
+    assert ticks > 5
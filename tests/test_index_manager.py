@@ -0,0 +1,77 @@
+# tests/test_index_manager.py
+import pytest
+from llama_index.core import Settings
+
+from backend.core.chroma_manager import ChromaManager
+from backend.models.bot import Bot
+from backend.services.index_manager import IndexManager
+from benchmarks.fakes import FakeEmbedding
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "embed_model", FakeEmbedding(request_latency=0.0))
+    state = tmp_path / "state"
+    chroma_manager = ChromaManager(str(tmp_path / "chroma"))
+    index_manager = IndexManager(
+        chroma_manager, state_dir=str(state), parse_workers=1,
+        parse_cache_dir=str(state / "parsed"),
+        keyword_index_path=str(state / "keywords.sqlite3"),
+        versions_path=str(state / "versions.sqlite3"))
+    yield index_manager
+    index_manager.close()
+    chroma_manager.close()
+
+
+@pytest.fixture
+def bot(tmp_path):
+    data_dir = tmp_path / "data_bot1"
+    data_dir.mkdir()
+    (data_dir / "ley.txt").write_text(
+        "Artículo 79. Los plazos de prescripción se cuentan por días.",
+        encoding="utf-8")
+    return Bot(id="bot1", name="Bot 1", description="", system_prompt="",
+               collection_name="documents_collection_bot1", data_dir=str(data_dir))
+
+
+def retrieve(index, query="plazos de prescripción"):
+    return index.as_retriever(similarity_top_k=1).retrieve(query)
+
+
+def test_rebind_moves_index_to_new_client(manager, bot):
+    index = manager.build_index(bot)
+    assert retrieve(index)
+
+    manager.chroma_manager.refresh()
+    manager.rebind(bot, index)
+    # Stops the system the index was built on
+    manager.chroma_manager.refresh()
+    manager.rebind(bot, index)
+
+    # Rebinding sets ChromaVectorStore._collection, a llama_index internal:
+    # if it stopped being the collection queries use, this would fail
+    assert index.vector_store._collection is not None
+    assert "prescripción" in retrieve(index)[0].node.get_content()
+
+
+def test_index_not_rebound_fails_once_its_client_is_stopped(manager, bot):
+    index = manager.build_index(bot)
+
+    manager.chroma_manager.refresh()
+    manager.chroma_manager.refresh()
+
+    with pytest.raises(Exception):
+        retrieve(index)
+
+
+def test_pinned_client_outlives_refreshes(manager, bot):
+    index = manager.build_index(bot)
+
+    with manager.chroma_manager.pinned():
+        manager.chroma_manager.refresh()
+        manager.chroma_manager.refresh()
+        assert retrieve(index)
+
+    manager.chroma_manager.refresh()
+    with pytest.raises(Exception):
+        retrieve(index)
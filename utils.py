@@ -2,6 +2,7 @@ import logging
 import os
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
+from backend.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -33,10 +34,10 @@ class FileManager:
 
     @staticmethod
     def get_directory_files(directory: str) -> list:
-        """Get list of files in a directory."""
+        """Get list of files in a directory, skipping hidden and partial uploads."""
         if not os.path.exists(directory):
             return []
-        return os.listdir(directory)
+        return [name for name in os.listdir(directory) if not name.startswith(".")]
 
 
 class ConfigManager:
@@ -44,22 +45,8 @@ class ConfigManager:
 
     @staticmethod
     def load_bot_config() -> Dict[str, Any]:
-        """Load bot configuration from environment or config file."""
+        """Bots from the settings, used to seed a new bot registry."""
         return {
-            "bot1": {
-                "id": "bot1",
-                "name": "Derechos Humanos",
-                "description": "Asistente general para consultas de documentos",
-                "system_prompt": "Responde siempre en español de manera formal y técnica.",
-                "collection_name": "documents_collection_bot1",
-                "data_dir": "./data_bot1"
-            },
-            "bot2": {
-                "id": "bot2",
-                "name": "Penal II",
-                "description": "Especialista en documentación técnica",
-                "system_prompt": "Responde en español, enfocándote en detalles técnicos y específicos.",
-                "collection_name": "documents_collection_bot2",
-                "data_dir": "./data_bot2"
-            }
+            bot_id: {"id": bot_id, **config}
+            for bot_id, config in settings.BOT_CONFIG.items()
         }